@@ -0,0 +1,120 @@
+import argparse
+import os
+import sqlite3
+from datetime import date
+
+import db
+from db import get_connection, transaction
+import queries
+import date_ranges
+import date_codec
+from database_setup import archive_schema
+
+# ---------- Attendance Archive ----------
+# Moves closed years of attendance out of the live table into one file per
+# year next to the database (attendance_system.archive-2023.db). Every
+# connection attaches those files and reads attendance through the
+# all_attendance view (see db.py), so history, statistics and reports
+# still cover every year while the live table and its indexes only hold
+# the recent ones. The monthly summary keeps its rows for archived years.
+#
+# SQLite commits each attached WAL database on its own, so a year moves in
+# two steps: copy it into the archive, then delete it from the live table.
+# Both are idempotent; after a crash between them, archive the year again.
+#
+# Other processes attach archives when they open their connections, so
+# archive with the app closed (or restart it afterwards). Attendance for
+# an archived year should not be imported into the live table again.
+
+ARCHIVE_SUMMARY = "temp.archived_summary"
+
+
+def _schema(year):
+    return f"archive_{year}"
+
+
+def _create_archive(year):
+    limit = get_connection().getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if len(db.archive_years()) >= limit:
+        raise ValueError(f"At most {limit} years can be archived")
+    archive = sqlite3.connect(db.archive_path(year))
+    try:
+        archive.execute("PRAGMA journal_mode = WAL")
+        for statement in archive_schema("main", date_codec.codec().integer):
+            archive.execute(statement)
+        archive.commit()
+    finally:
+        archive.close()
+    # Reopen so every connection attaches the new file
+    db.close_all()
+
+
+def archive_year(year):
+    # Returns the number of rows moved out of the live table.
+    year = int(year)
+    if year >= date.today().year:
+        raise ValueError(f"{year} is not over yet; only past years can be archived")
+    start, end = date_codec.codec().range(*date_ranges.year_range(year))
+    if not os.path.exists(db.archive_path(year)):
+        if not get_connection().execute(queries.ARCHIVE_HAS_YEAR, (start, end)).fetchone()[0]:
+            return 0    # nothing to archive; don't use up an attachment
+        _create_archive(year)
+    schema = _schema(year)
+
+    # Step 1: copy
+    with transaction() as conn:
+        conn.execute(queries.ARCHIVE_COPY_YEAR.format(schema=schema), (start, end))
+
+    # Step 2: delete from the live table. The delete triggers would take
+    # the year out of the monthly summary and log every row as changed, so
+    # the summary is put back and those change_log entries are dropped.
+    with transaction() as conn:
+        missing = conn.execute(queries.ARCHIVE_MISSING_ROWS.format(schema=schema),
+                               (start, end)).fetchone()[0]
+        if missing:
+            raise RuntimeError(f"{missing} rows of {year} are not in the archive")
+        position = conn.execute(queries.CHANGE_LOG_POSITION).fetchone()[0] or 0
+        conn.execute(f"""CREATE TEMP TABLE {ARCHIVE_SUMMARY} AS
+                         SELECT * FROM attendance_monthly_summary WHERE year = ?""", (year,))
+        moved = conn.execute(queries.ARCHIVE_DELETE_YEAR, (start, end)).rowcount
+        conn.execute(f"""INSERT OR REPLACE INTO attendance_monthly_summary
+                         SELECT * FROM {ARCHIVE_SUMMARY}""")
+        conn.execute(f"DROP TABLE {ARCHIVE_SUMMARY}")
+        conn.execute("DELETE FROM change_log WHERE seq > ?", (position,))
+    return moved
+
+
+def archives():
+    # (year, rows, first date, last date) of every archive file.
+    conn = get_connection()
+    iso_date = date_codec.codec().iso_date
+    result = []
+    for year in db.archive_years():
+        rows, first, last = conn.execute(
+            queries.ARCHIVE_ROW_COUNT.format(schema=_schema(year))).fetchone()
+        result.append((year, rows, first and iso_date(first), last and iso_date(last)))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Move closed years of attendance into per-year archive files.")
+    parser.add_argument("years", nargs="*", type=int, help="years to archive")
+    parser.add_argument("--before", type=int,
+                        help="archive every year before this one that has attendance")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="shrink the live database file afterwards")
+    args = parser.parse_args()
+
+    years = set(args.years)
+    if args.before:
+        first = get_connection().execute("SELECT MIN(date) FROM main.attendance").fetchone()[0]
+        if first:
+            first = date_codec.codec().iso_date(first)
+            years.update(range(int(first[:4]), args.before))
+    for year in sorted(years):
+        print(f"{year}: moved {archive_year(year)} rows to {db.archive_path(year)}")
+    if args.vacuum and years:
+        get_connection().execute("VACUUM main")
+    for year, rows, first, last in archives():
+        print(f"archive {year}: {rows} rows ({first} .. {last})")
@@ -0,0 +1,129 @@
+import calendar
+from datetime import date, timedelta
+
+from db import get_connection
+import queries
+import date_ranges
+import date_codec
+import work_calendar
+
+# ---------- Attendance Bitmaps ----------
+# Each monthly summary row carries a bitmap per status next to its counts:
+# bit d - 1 of present_bits is set when the employee was present on day d
+# of that month (database_setup.SUMMARY_TABLE; the summary triggers keep
+# them current). A month of attendance is then three small integers, so
+# streaks and patterns are bitwise operations on a few summary rows
+# instead of a scan of attendance rows.
+
+
+def month_mask(year, month, first_day=1, last_day=None):
+    # Bits of days first_day..last_day (inclusive) of the month.
+    last_day = last_day or calendar.monthrange(year, month)[1]
+    return ((1 << (last_day - first_day + 1)) - 1) << (first_day - 1)
+
+
+def runs(bits):
+    # Each run of consecutive set bits, lowest first, as a mask.
+    while bits:
+        low = bits & -bits
+        # Adding the lowest set bit carries through its run
+        run = ((bits + low) ^ bits) & bits
+        yield run
+        bits ^= run
+
+
+def month_bits(employee_id, start, end):
+    # [(year, month, present, absent, on_leave)] bitmaps of the employee's
+    # months in the half-open ISO range [start, end), with the days
+    # outside it cleared. Either end may be open (date_ranges.ALL_DATES).
+    first = (None if start == date_ranges.MIN_DATE else date.fromisoformat(start))
+    last = (None if end == date_ranges.MAX_DATE
+            else date.fromisoformat(end) - timedelta(days=1))
+    rows = get_connection().execute(
+        queries.SUMMARY_BITS, (employee_id, *((first.year, first.month) if first else (0, 1)),
+                               *((last.year, last.month) if last else (9999, 12)))).fetchall()
+    result = []
+    for year, month, present, absent, on_leave in rows:
+        mask = month_mask(year, month,
+                          first.day if first and (year, month) == (first.year, first.month) else 1,
+                          last.day if last and (year, month) == (last.year, last.month) else None)
+        result.append((year, month, present & mask, absent & mask, on_leave & mask))
+    return result
+
+
+def _shift(bits, days):
+    return bits << days if days >= 0 else bits >> -days
+
+
+def first_recorded_day(employee_id):
+    # The employee's first day with an attendance row, or None.
+    row = get_connection().execute(queries.FIRST_SUMMARY_MONTH, (employee_id,)).fetchone()
+    if row is None:
+        return None
+    year, month, recorded = row
+    return date(year, month, (recorded & -recorded).bit_length())
+
+
+def _timeline(employee_id, start, end):
+    # The employee's days in [start, end) as (days, present, on_leave,
+    # working), bit i of each bitmap being day i from the first. As in
+    # work_calendar.attendance_counts, the days begin at the later of start
+    # and the employee's first recorded day and run to yesterday, or to
+    # today once it has a row; working days without a row are on leave
+    # under an approved leave and absent otherwise.
+    work_calendar.ensure_calendar()
+    first_recorded = first_recorded_day(employee_id)
+    if first_recorded is None:
+        return 0, 0, 0, 0
+    first_day = first_recorded
+    if start != date_ranges.MIN_DATE:
+        first_day = max(first_day, date.fromisoformat(start))
+    last_day = date.today()
+    if end != date_ranges.MAX_DATE:
+        last_day = min(last_day, date.fromisoformat(end) - timedelta(days=1))
+    after_last = (last_day + timedelta(days=1)).isoformat()
+    days = (last_day - first_day).days + 1
+    if days <= 0:
+        return 0, 0, 0, 0
+
+    present = on_leave = recorded = 0
+    for year, month, present_bits, absent_bits, leave_bits in month_bits(
+            employee_id, first_day.isoformat(), after_last):
+        shift = (date(year, month, 1) - first_day).days
+        present |= _shift(present_bits, shift)
+        on_leave |= _shift(leave_bits, shift)
+        recorded |= _shift(present_bits | absent_bits | leave_bits, shift)
+    if last_day == date.today() and not recorded >> (days - 1) & 1:
+        days -= 1       # today counts once it has a row
+    everything = (1 << days) - 1
+
+    conn = get_connection()
+    first = date_codec.day_number(first_day.isoformat())
+    for (day,) in conn.execute(queries.APPROVED_LEAVE_DAYS,
+                               (employee_id, first_day.isoformat(), after_last)):
+        on_leave |= 1 << (day - first) & ~recorded
+    # Days missing from the calendar count as working days
+    working = everything
+    for (day,) in conn.execute(queries.OFF_DAYS, (first_day.isoformat(), after_last)):
+        working &= ~(1 << (day - first))
+    return days, present & everything, on_leave & everything, working & everything
+
+
+def streaks(employee_id, start=date_ranges.MIN_DATE, end=date_ranges.MAX_DATE):
+    # (current present streak, longest present streak, longest absence
+    # streak), in working days, over the days _timeline() covers. Weekends
+    # and holidays neither break nor extend a streak; a day on leave ends
+    # both kinds, and a working day without a row counts as absent.
+    days, present, on_leave, working = _timeline(employee_id, start, end)
+    if not days:
+        return 0, 0, 0
+    off = ~working & ((1 << days) - 1)
+    attended = present | off
+    absent = ~(present | on_leave) & working | off
+    longest_present = max(((run & working).bit_count() for run in runs(attended)), default=0)
+    longest_absent = max(((run & working).bit_count() for run in runs(absent)), default=0)
+    # The current streak runs back from the last day to the latest one
+    # that breaks it
+    breaks_at = (~attended & ((1 << days) - 1)).bit_length()
+    current = (working & ~((1 << breaks_at) - 1)).bit_count()
+    return current, longest_present, longest_absent
@@ -0,0 +1,230 @@
+from datetime import date, timedelta
+from typing import NamedTuple
+
+import numpy as np
+
+from db import get_connection, attendance_sources
+import queries
+import date_ranges
+import date_codec
+import work_calendar
+from employee_directory import directory
+
+# ---------- Company Attendance Heatmap ----------
+# Loads every employee's attendance over a date range into an
+# employees x days uint8 matrix: one query per attendance table returns
+# each employee's rows packed into a string (see
+# queries.HEATMAP_ATTENDANCE), which numpy decodes and scatters into place
+# in a few array operations, with no Python per row. Per-role
+# and per-day totals and the heatmap image are computed from the matrix
+# with array operations, so a year of 5,000 employees stays interactive.
+#
+# numpy is only needed here; main_app imports this module when the
+# Analytics tab first loads.
+
+NO_RECORD, PRESENT, ON_LEAVE, ABSENT = 0, 1, 2, 3
+STATUS_NAMES = ("No record", "Present", "On Leave", "Absent")
+OFF_DAY = 4                 # colour of a weekend / holiday with no record
+# Packed codes must stay below the UTF-16 surrogates (0xD800)
+MAX_DAYS = 3660
+
+COLORS = np.array([
+    (224, 224, 224),        # no record
+    (76, 175, 80),          # present
+    (33, 150, 243),         # on leave
+    (244, 67, 54),          # absent
+    (250, 250, 250),        # weekend / holiday
+], dtype=np.float32)
+
+
+class Image(NamedTuple):
+    ppm: bytes              # binary PPM, for tk.PhotoImage(data=...)
+    width: int
+    height: int
+    rows: tuple             # (employees per pixel row, pixels per employee)
+    columns: tuple          # (days per pixel column, pixels per day)
+    role_rows: list         # [(role, first pixel row)]
+
+
+def _fit(count, size):
+    # (group, repeat): `group` items are averaged into each cell and each
+    # cell is drawn `repeat` pixels wide, so `count` items fit in `size`.
+    if count > size:
+        return -(-count // size), 1
+    return 1, max(1, size // max(count, 1))
+
+
+def _scale(rgb, axis, group, repeat):
+    if group > 1:
+        count = rgb.shape[axis]
+        padded = -(-count // group) * group
+        # Pad with the last item so the final partial group keeps its colour
+        pad = [(0, 0)] * rgb.ndim
+        pad[axis] = (0, padded - count)
+        rgb = np.pad(rgb, pad, mode="edge")
+        shape = rgb.shape[:axis] + (padded // group, group) + rgb.shape[axis + 1:]
+        rgb = rgb.reshape(shape).mean(axis=axis + 1)
+    return np.repeat(rgb, repeat, axis=axis) if repeat > 1 else rgb
+
+
+def _span(pixel, count, group, repeat):
+    # Items [first, last) drawn at this pixel.
+    first = pixel // repeat * group
+    return first, min(count, first + group)
+
+
+class Heatmap:
+    def __init__(self, start, working, employee_ids, names, roles, cells):
+        self.start = start                  # date of column 0
+        self.working = working              # (days,) bool
+        self.employee_ids = employee_ids    # (employees,), by role then id
+        self.names = names
+        self.roles = roles                  # (employees,) str
+        self.cells = cells                  # (employees, days) status codes
+
+    @property
+    def days(self):
+        return self.cells.shape[1]
+
+    def day(self, column):
+        return self.start + timedelta(days=int(column))
+
+    def _counted_days(self):
+        # Working days up to today; later days have no record yet
+        past = np.arange(self.days) <= (date.today() - self.start).days
+        return self.working & past
+
+    def role_totals(self):
+        # [(role, employees, present, on leave, absent, no record, rate %)]
+        # over the working days so far; rate is present / working days.
+        counted = self.cells[:, self._counted_days()]
+        per_employee = np.stack([(counted == code).sum(axis=1)
+                                 for code in (PRESENT, ON_LEAVE, ABSENT, NO_RECORD)], axis=1)
+        roles, first = np.unique(self.roles, return_index=True)
+        order = np.argsort(first)
+        roles, first = roles[order], first[order]
+        totals = np.add.reduceat(per_employee, first, axis=0) if len(first) else per_employee[:0]
+        sizes = np.diff(np.append(first, len(self.roles)))
+        result = []
+        for role, size, (present, on_leave, absent, unrecorded) in zip(roles, sizes, totals):
+            possible = size * counted.shape[1]
+            rate = round(100 * int(present) / possible, 1) if possible else 0.0
+            result.append((str(role), int(size), int(present), int(on_leave), int(absent),
+                           int(unrecorded), rate))
+        return result
+
+    def day_totals(self):
+        # [(date, weekday, present, on leave, absent, no record, rate %)]
+        # per working day so far; rate is present / employees.
+        counts = np.stack([(self.cells == code).sum(axis=0)
+                           for code in (PRESENT, ON_LEAVE, ABSENT, NO_RECORD)], axis=1)
+        employees = max(len(self.employee_ids), 1)
+        result = []
+        for column in np.flatnonzero(self._counted_days()):
+            day = self.day(column)
+            present, on_leave, absent, unrecorded = (int(n) for n in counts[column])
+            result.append((day.isoformat(), day.strftime("%A"), present, on_leave, absent,
+                           unrecorded, round(100 * present / employees, 1)))
+        return result
+
+    def render(self, width, height):
+        # Heatmap scaled to fit width x height pixels: days across,
+        # employees down (grouped by role). When there are more employees
+        # or days than pixels, neighbours are averaged into one pixel.
+        if not len(self.employee_ids):
+            raise ValueError("There are no employees to draw")
+        if width <= 0 or height <= 0:
+            raise ValueError("The heatmap needs a width and height of at least one pixel")
+        codes = np.where((self.cells == NO_RECORD) & ~self.working, OFF_DAY, self.cells)
+        rgb = COLORS[codes]
+        rows = _fit(len(self.employee_ids), height)
+        columns = _fit(self.days, width)
+        rgb = _scale(_scale(rgb, 0, *rows), 1, *columns)
+        pixels = rgb.astype(np.uint8)
+        image_height, image_width = pixels.shape[:2]
+        header = f"P6 {image_width} {image_height} 255\n".encode()
+        _, first = np.unique(self.roles, return_index=True)
+        role_rows = [(str(self.roles[row]), int(row) // rows[0] * rows[1]) for row in sorted(first)]
+        return Image(header + pixels.tobytes(), image_width, image_height,
+                     rows, columns, role_rows)
+
+    def describe(self, image, x, y):
+        # Hover text for pixel (x, y) of a rendered image.
+        if not (0 <= x < image.width and 0 <= y < image.height):
+            return ""
+        first_row, last_row = _span(y, len(self.employee_ids), *image.rows)
+        first_column, last_column = _span(x, self.days, *image.columns)
+        if last_row <= first_row or last_column <= first_column:
+            return ""
+        day = self.day(first_column)
+        when = (f"{day:%d-%m-%Y} ({day:%A})" if last_column - first_column == 1
+                else f"{day:%d-%m-%Y} .. {self.day(last_column - 1):%d-%m-%Y}")
+        if last_row - first_row == 1:
+            code = int(self.cells[first_row, first_column])
+            status = STATUS_NAMES[code] if last_column - first_column == 1 else ""
+            who = f"{self.names[first_row]} (#{self.employee_ids[first_row]}, {self.roles[first_row]})"
+            return f"{who}  {when}  {status}".rstrip()
+        block = self.cells[first_row:last_row, first_column:last_column]
+        present = 100 * (block == PRESENT).mean()
+        roles = " / ".join(dict.fromkeys(self.roles[first_row:last_row]))
+        return (f"{last_row - first_row} employees ({roles})  {when}  "
+                f"{present:.0f}% present")
+
+
+def load(start, end):
+    # Heatmap of every current employee over the half-open ISO range
+    # [start, end); both ends must be real dates.
+    work_calendar.ensure_calendar()
+    conn = get_connection()
+    codec = date_codec.codec()
+    first = date_codec.day_number(start)
+    days = date_codec.day_number(end) - first
+    if days <= 0:
+        raise ValueError("The range is empty")
+    if days > MAX_DAYS:
+        raise ValueError(f"The heatmap covers at most {MAX_DAYS} days")
+
+    employees = directory.page()
+    ids = np.fromiter((employee.id for employee in employees), dtype=np.int64,
+                      count=len(employees))
+    cells = np.zeros((len(employees), days), dtype=np.uint8)
+    params = {"first": first}
+    params["start"], params["end"] = codec.range(start, end)
+    day = "a.date" if codec.integer else "CAST(julianday(a.date) + 0.5 AS INTEGER)"
+    for source in attendance_sources(conn):
+        cursor = conn.execute(queries.HEATMAP_ATTENDANCE.format(attendance=source, day=day),
+                              params)
+        packed = cursor.fetchall()
+        if not packed or not len(ids):
+            continue
+        owners = np.fromiter((employee_id for employee_id, _ in packed), dtype=np.int64,
+                             count=len(packed))
+        lengths = np.fromiter((len(text) for _, text in packed), dtype=np.int64,
+                              count=len(packed))
+        codes = np.frombuffer("".join(text for _, text in packed).encode("utf-32-le"),
+                              dtype=np.uint32).astype(np.int64) - 64
+        # Ids are sorted (directory order); employees added since the
+        # directory was loaded are left out
+        index = np.minimum(np.searchsorted(ids, owners), len(ids) - 1)
+        known = np.repeat(ids[index] == owners, lengths)
+        rows = np.repeat(index, lengths)[known]
+        codes = codes[known]
+        cells[rows, codes >> 2] = codes & 3
+
+    # Days missing from the calendar count as working days
+    working = np.ones(days, dtype=bool)
+    calendar = np.array(conn.execute(queries.CALENDAR_DAYS, (start, end)).fetchall(),
+                        dtype=np.int64).reshape(-1, 2)
+    working[calendar[:, 0] - first] = calendar[:, 1].astype(bool)
+
+    roles = np.array([employee.role or "" for employee in employees], dtype=object)
+    order = np.lexsort((ids, roles.astype(str)))
+    names = [employees[row].name for row in order]
+    return Heatmap(date.fromisoformat(start), working, ids[order], names, roles[order],
+                   cells[order])
+
+
+def load_month(year, month=None):
+    # A whole year when month is None.
+    return load(*(date_ranges.year_range(year) if month is None
+                  else date_ranges.month_range(year, month)))
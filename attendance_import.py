@@ -0,0 +1,203 @@
+import argparse
+import csv
+import os
+import time
+
+import pandas as pd # type: ignore
+
+from db import transaction
+import queries
+import date_codec
+import database_setup
+from employee_directory import directory
+
+# ---------- Bulk Attendance Import ----------
+# Streams a biometric-terminal export (CSV or Excel) in chunks, validates
+# each chunk with vectorized pandas operations against the employees
+# table, and inserts the survivors with executemany, one transaction per
+# chunk. Rejected rows are written to a side file with the reason.
+#
+# Accepted columns (case-insensitive):
+#   employee_id or email        -- who punched
+#   date + time, or timestamp   -- when ('YYYY-MM-DD', 'HH:MM:SS')
+#   status                      -- optional, defaults to 'Present'
+
+CHUNK_SIZE = 50_000
+VALID_STATUSES = ("Present", "Absent", "On Leave")
+
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.seconds = 0.0
+        self.rejects_path = None
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        text = (f"Read {self.read} rows in {self.seconds:.1f}s "
+                f"({self.rows_per_second:,.0f} rows/s): "
+                f"{self.inserted} inserted, {self.duplicates} already recorded, "
+                f"{self.rejected} rejected")
+        if self.rejected and self.rejects_path:
+            text += f" (see {self.rejects_path})"
+        return text
+
+
+# ---------- Reading ----------
+def _read_chunks(path, chunk_size):
+    # Yields DataFrames of string columns; Excel is streamed row by row
+    # through openpyxl's read-only mode since pandas cannot chunk it.
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook # type: ignore
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(value) for value in next(rows)]
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == chunk_size:
+                    yield pd.DataFrame(batch, columns=header).astype("string")
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header).astype("string")
+        finally:
+            workbook.close()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype="string",
+                               skipinitialspace=True)
+
+
+# ---------- Validation ----------
+def _load_directory():
+    employees = directory.page()
+    ids = pd.Index([employee.id for employee in employees])
+    by_email = pd.Series([employee.id for employee in employees],
+                         index=[employee.email.lower() for employee in employees], dtype="Int64")
+    return ids, by_email
+
+
+def _encode(stamp):
+    # Julian day numbers and seconds since midnight (date_codec.py),
+    # a whole column at a time.
+    day = stamp.dt.normalize()
+    return ((day - pd.Timestamp("1970-01-01")).dt.days + date_codec.day_number("1970-01-01"),
+            (stamp - day).dt.total_seconds().astype("int64"))
+
+
+def _validate(chunk, ids, by_email, integer_dates=False):
+    # Returns (clean rows frame, rejected frame with a 'reason' column).
+    chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+    reason = pd.Series(pd.NA, index=chunk.index, dtype="string")
+
+    if "employee_id" in chunk:
+        employee_id = pd.to_numeric(chunk["employee_id"].str.strip(), errors="coerce").astype("Int64")
+    elif "email" in chunk:
+        employee_id = chunk["email"].str.strip().str.lower().map(by_email).astype("Int64")
+    else:
+        raise ValueError("File needs an 'employee_id' or 'email' column")
+
+    if "timestamp" in chunk:
+        stamp = pd.to_datetime(chunk["timestamp"].str.strip(), errors="coerce")
+    elif "date" in chunk and "time" in chunk:
+        stamp = pd.to_datetime(chunk["date"].str.strip() + " " + chunk["time"].str.strip(),
+                               format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    else:
+        raise ValueError("File needs 'date' and 'time' columns, or a 'timestamp' column")
+
+    if "status" in chunk:
+        status = chunk["status"].str.strip().fillna("Present")
+    else:
+        status = pd.Series("Present", index=chunk.index, dtype="string")
+
+    # Later checks only fill reasons that are still empty, so each
+    # rejected row reports the first problem found.
+    reason = reason.mask(~status.isin(VALID_STATUSES), "unknown status")
+    reason = reason.mask(reason.isna() & stamp.isna(), "bad date/time")
+    reason = reason.mask(reason.isna() & employee_id.isna(), "unknown employee")
+    reason = reason.mask(reason.isna() & ~employee_id.isin(ids), "unknown employee")
+
+    bad = reason.notna()
+    rejected = chunk[bad].assign(reason=reason[bad])
+
+    if integer_dates:
+        dates, times = _encode(stamp[~bad])
+    else:
+        dates, times = stamp[~bad].dt.strftime("%Y-%m-%d"), stamp[~bad].dt.strftime("%H:%M:%S")
+    clean = pd.DataFrame({
+        "employee_id": employee_id[~bad].astype("int64"),
+        "date": dates,
+        "time": times,
+        "status": status[~bad],
+    })
+    # Terminals log every swipe; keep the first punch of each day.
+    clean = (clean.sort_values(["employee_id", "date", "time"])
+                  .drop_duplicates(["employee_id", "date"], keep="first"))
+    return clean, rejected
+
+
+# ---------- Import ----------
+def import_attendance(path, chunk_size=CHUNK_SIZE, rejects_path=None, on_progress=None):
+    report = ImportReport()
+    report.rejects_path = rejects_path or os.path.splitext(path)[0] + ".rejected.csv"
+    ids, by_email = _load_directory()
+    integer_dates = date_codec.codec().integer
+    started = time.perf_counter()
+    rejects_file = None
+    writer = None
+
+    try:
+        for chunk in _read_chunks(path, chunk_size):
+            first_line = report.read + 2        # header is line 1
+            report.read += len(chunk)
+            clean, rejected = _validate(chunk, ids, by_email, integer_dates)
+
+            if len(rejected):
+                if writer is None:
+                    rejects_file = open(report.rejects_path, "w", newline="")
+                    writer = csv.writer(rejects_file)
+                    writer.writerow(["line", *rejected.columns])
+                lines = rejected.index - chunk.index[0] + first_line
+                writer.writerows([line, *values] for line, values in
+                                 zip(lines, rejected.astype(object).fillna("").itertuples(index=False)))
+                report.rejected += len(rejected)
+
+            report.duplicates += len(chunk) - len(rejected) - len(clean)
+            params = list(clean.itertuples(index=False, name=None))
+            with transaction() as conn:
+                # One row per employee per day: a recorded day is kept,
+                # unless the end-of-day close marked it Absent and the file
+                # has a punch. rowcount, unlike total_changes, leaves out
+                # trigger writes.
+                inserted = conn.executemany(queries.IMPORT_ATTENDANCE, params).rowcount
+            report.inserted += inserted
+            report.duplicates += len(params) - inserted
+
+            report.seconds = time.perf_counter() - started
+            if on_progress is not None:
+                on_progress(report)
+    finally:
+        if rejects_file is not None:
+            rejects_file.close()
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import attendance punches from CSV or Excel.")
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--rejects", help="where to write rejected rows (default: <file>.rejected.csv)")
+    args = parser.parse_args()
+
+    database_setup.ensure_schema()
+    result = import_attendance(args.path, args.chunk_size, args.rejects,
+                               on_progress=lambda r: print(r.summary(), flush=True))
+    print(result.summary())
@@ -0,0 +1,155 @@
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk, messagebox
+
+# ---------- Background Query Executor ----------
+# Database work runs on a small worker pool (each worker gets its own pooled
+# connection from db.py) and results are handed back to the Tk thread by a
+# root.after() poll, because Tk must only be touched from the thread that
+# runs mainloop().
+
+WORKERS = 4
+POLL_MS = 15
+
+
+def show_database_error(error, parent=None):
+    messagebox.showerror("Database Error",
+                       f"An error occurred: {str(error)}",
+                       parent=parent)
+
+
+class QueryExecutor:
+    def __init__(self, root, workers=WORKERS):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._latest = {}           # key -> ticket of the newest request
+        self._futures = {}          # ticket -> future, until delivered
+        self._tickets = iter(range(1, 1 << 62))
+        self._lock = threading.Lock()
+        self._polling = False
+        self._busy_listeners = []
+
+    def submit(self, work, on_done=None, on_error=None, key=None, owner=None):
+        # work() runs on a worker thread and must not touch Tk.
+        # on_done(result) / on_error(exc) run on the Tk thread, and are
+        # skipped if `owner` (a widget) has been destroyed meanwhile or a
+        # newer request with the same `key` superseded this one.
+        ticket = next(self._tickets)
+        if key is not None:
+            previous = self._latest.get(key)
+            self._latest[key] = ticket
+            if previous is not None:
+                self._cancel(previous)
+
+        def run():
+            try:
+                result = (True, work())
+            except Exception as exc:
+                result = (False, exc)
+            self._results.put((ticket, key, on_done, on_error, owner, result))
+
+        with self._lock:
+            self._futures[ticket] = self._pool.submit(run)
+        self._set_busy()
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._drain)
+        return ticket
+
+    def _cancel(self, ticket):
+        with self._lock:
+            future = self._futures.get(ticket)
+        # A job that has not started yet is dropped outright; one that is
+        # already running finishes, but its result is thrown away.
+        if future is not None and future.cancel():
+            with self._lock:
+                self._futures.pop(ticket, None)
+            self._set_busy()
+
+    def _drain(self):
+        try:
+            while True:
+                try:
+                    ticket, key, on_done, on_error, owner, (ok, value) = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                with self._lock:
+                    self._futures.pop(ticket, None)
+                if key is not None:
+                    if self._latest.get(key) != ticket:
+                        continue        # superseded
+                    del self._latest[key]
+                if owner is not None and not owner.winfo_exists():
+                    continue
+                try:
+                    if ok:
+                        if on_done is not None:
+                            on_done(value)
+                    elif on_error is not None:
+                        on_error(value)
+                    else:
+                        show_database_error(value, parent=owner)
+                except Exception:
+                    # Reported like any Tk callback error; later results
+                    # are still delivered
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self._set_busy()
+            if self.pending():
+                self.root.after(POLL_MS, self._drain)
+            else:
+                self._polling = False
+
+    # ---------- Busy State ----------
+    def pending(self):
+        with self._lock:
+            return len(self._futures)
+
+    def add_busy_listener(self, listener):
+        self._busy_listeners.append(listener)
+        listener(self.pending() > 0)
+
+    def remove_busy_listener(self, listener):
+        if listener in self._busy_listeners:
+            self._busy_listeners.remove(listener)
+
+    def _set_busy(self):
+        busy = self.pending() > 0
+        for listener in list(self._busy_listeners):
+            listener(busy)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------- Busy Indicator ----------
+class BusyIndicator(ttk.Frame):
+    # "Loading..." label with an indeterminate bar, shown while the
+    # executor has outstanding work.
+    def __init__(self, parent, executor):
+        super().__init__(parent)
+        self.executor = executor
+        self._label = ttk.Label(self, text="Loading...", font=("Segoe UI", 9))
+        self._bar = ttk.Progressbar(self, mode="indeterminate", length=80)
+        self._shown = False
+        executor.add_busy_listener(self._update)
+        self.bind("<Destroy>", self._on_destroy)
+
+    def _update(self, busy):
+        if busy and not self._shown:
+            self._label.pack(side="left", padx=(0, 5))
+            self._bar.pack(side="left")
+            self._bar.start(15)
+        elif not busy and self._shown:
+            self._bar.stop()
+            self._bar.pack_forget()
+            self._label.pack_forget()
+        self._shown = busy
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.executor.remove_busy_listener(self._update)
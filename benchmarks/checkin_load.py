@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import db
+import date_codec
+from benchmarks.generate_data import generate
+from benchmarks.run_benchmarks import DEFAULT_DB
+
+# ---------- Check-In Server Load Test ----------
+# Starts checkin_server.py on a database in its own process and has many
+# keep-alive clients check in at once, like the kiosks at 9:00. Reports the
+# clients' latency percentiles and throughput next to the server's own
+# /stats (p99 latency and group-commit batch sizes) as JSON. Check-ins are
+# dated past the generated data and removed afterwards.
+#
+#   python -m benchmarks.checkin_load --clients 200 --checkins 20000
+#   python -m benchmarks.checkin_load --max-batch 1     # a commit per check-in
+
+CLIENTS = 200
+CHECKINS = 10_000
+CHECKIN_EPOCH = datetime(2100, 1, 1, 9, 0, 0)
+
+
+async def _request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _client(port, jobs, latencies, statuses):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while jobs:
+            employee_id, when = jobs.pop()
+            started = time.perf_counter()
+            status, _ = await _request(reader, writer, "POST", "/checkin",
+                                       {"employee_id": employee_id, "time": when.isoformat()})
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def _load(port, employees, clients, checkins):
+    # Every check-in is a different (employee, day), so each one writes
+    jobs = [(k % employees + 1, CHECKIN_EPOCH + timedelta(days=k // employees))
+            for k in range(checkins)]
+    jobs.reverse()
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(port, jobs, latencies, statuses) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, server_stats = await _request(reader, writer, "GET", "/stats")
+    writer.close()
+
+    millis = [seconds * 1000 for seconds in latencies]
+    cuts = statistics.quantiles(millis, n=100, method="inclusive")
+    return {
+        "clients": clients,
+        "checkins": checkins,
+        "seconds": round(elapsed, 3),
+        "checkins_per_s": round(checkins / elapsed, 1),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "client_latency_ms": {"p50": round(cuts[49], 3), "p95": round(cuts[94], 3),
+                              "p99": round(cuts[98], 3), "max": round(max(millis), 3)},
+        "server": server_stats,
+    }
+
+
+def _remove_load_writes():
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM attendance WHERE date >= ?",
+                     (date_codec.codec().stamp(CHECKIN_EPOCH)[0],))
+
+
+def run(path, clients=CLIENTS, checkins=CHECKINS, max_batch=None):
+    db.set_database_path(path)
+    employees = db.get_connection().execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+    command = [sys.executable, "checkin_server.py", "--db", os.path.abspath(path), "--port", "0",
+               "--report-every", "0"]
+    if max_batch:
+        command += ["--max-batch", str(max_batch)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        # "Listening on host:port"
+        port = int(server.stdout.readline().rsplit(":", 1)[1])
+        return asyncio.run(_load(port, employees, clients, checkins))
+    finally:
+        server.terminate()
+        server.wait()
+        _remove_load_writes()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the check-in server.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"database to use (default {DEFAULT_DB})")
+    parser.add_argument("--scale", type=float, default=0.01, help="data scale if generating")
+    parser.add_argument("--clients", type=int, default=CLIENTS, help="concurrent connections")
+    parser.add_argument("--checkins", type=int, default=CHECKINS)
+    parser.add_argument("--max-batch", type=int, help="passed on to the server")
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        generate(args.db, args.scale)
+    text = json.dumps(run(args.db, args.clients, args.checkins, args.max_batch), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,141 @@
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import db
+import database_setup
+
+# ---------- Synthetic Data Generator ----------
+# Builds a database with the production schema at a chosen scale, seeded so
+# two runs produce identical files. Secondary indexes and triggers are
+# dropped for the bulk load and rebuilt afterwards, as a restore would.
+#
+#   python -m benchmarks.generate_data benchmarks/bench.db --scale 0.01
+
+EMPLOYEES = 10_000
+ATTENDANCE_ROWS = 10_000_000
+LEAVES = 500_000
+
+ROLES = ["Manager", "Developer", "HR", "Designer", "Other"]
+GENDERS = ["Male", "Female", "Other"]
+LEAVE_STATUSES = [("Approved", 0.75), ("Rejected", 0.15), ("Pending", 0.10)]
+PRESENCE = 0.95         # share of working days with a check-in
+BATCH = 100_000
+
+
+def _working_days(count, last_day):
+    days = []
+    day = last_day
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day -= timedelta(days=1)
+    days.reverse()
+    return days
+
+
+def _drop_secondary_objects(conn):
+    rows = conn.execute("""
+        SELECT type, name FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+    """).fetchall()
+    for kind, name in rows:
+        conn.execute(f"DROP {kind.upper()} {name}")
+
+
+def _insert_batches(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate(path, scale=1.0, seed=42, quiet=False, integer_dates=False):
+    rng = random.Random(seed)
+    employees = max(1, int(EMPLOYEES * scale))
+    attendance_rows = int(ATTENDANCE_ROWS * scale)
+    leaves = int(LEAVES * scale)
+
+    def log(message):
+        if not quiet:
+            print(message, flush=True)
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db.set_database_path(path)
+    database_setup.setup_database()
+    conn = db.get_connection()
+    _drop_secondary_objects(conn)
+    conn.execute("PRAGMA synchronous = OFF")
+    started = time.perf_counter()
+
+    per_employee = attendance_rows // employees
+    days = _working_days(int(per_employee / PRESENCE) + 1, date.today() - timedelta(days=1))
+
+    with db.transaction():
+        log(f"employees: {employees}")
+        _insert_batches(conn, """
+            INSERT INTO employees (id, name, email, phone, Gender, Role, start_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, ((i, f"Employee {i}", f"employee{i}@example.com", f"9{i:09d}",
+               rng.choice(GENDERS), rng.choice(ROLES), days[0]) for i in range(1, employees + 1)))
+
+        log(f"attendance: ~{attendance_rows} rows over {len(days)} working days")
+
+        def attendance():
+            for employee_id in range(1, employees + 1):
+                for day in days:
+                    if rng.random() < PRESENCE:
+                        minute = rng.randrange(8 * 60, 10 * 60)
+                        yield (employee_id, day, f"{minute // 60:02d}:{minute % 60:02d}:00", "Present")
+
+        _insert_batches(conn, """
+            INSERT INTO attendance (employee_id, date, time, status) VALUES (?, ?, ?, ?)
+        """, attendance())
+
+        log(f"leaves: {leaves}")
+        statuses = [status for status, _ in LEAVE_STATUSES]
+        weights = [weight for _, weight in LEAVE_STATUSES]
+        first_day = date.fromisoformat(days[0])
+        span = (date.today() + timedelta(days=60) - first_day).days
+
+        _insert_batches(conn, """
+            INSERT INTO leaves (employee_id, date, reason, status) VALUES (?, ?, ?, ?)
+        """, ((rng.randint(1, employees),
+               (first_day + timedelta(days=rng.randrange(span))).isoformat(),
+               "Synthetic leave request",
+               rng.choices(statuses, weights)[0]) for _ in range(leaves)))
+
+    conn.execute("PRAGMA synchronous = NORMAL")
+    log("indexes, triggers and monthly summary")
+    database_setup.upgrade_database()
+    database_setup.rebuild_monthly_summary()
+    database_setup.rebuild_employee_search()
+    if integer_dates:
+        log("integer dates")
+        database_setup.migrate_to_integer_dates()
+        conn = db.get_connection()
+    conn.execute("ANALYZE")
+    log(f"done in {time.perf_counter() - started:.0f}s")
+    return {"employees": employees,
+            "attendance": conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0],
+            "leaves": leaves}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic attendance database.")
+    parser.add_argument("path")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="fraction of 10k employees / 10M attendance / 500k leaves")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--integer-dates", action="store_true",
+                        help="store attendance dates and times as integers (date_codec.py)")
+    args = parser.parse_args()
+    generate(args.path, args.scale, args.seed, integer_dates=args.integer_dates)
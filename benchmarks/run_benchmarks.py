@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+import db
+import date_ranges
+import date_codec
+import services
+import attendance_heatmap
+from benchmarks.generate_data import generate
+
+# ---------- Query Benchmarks ----------
+# Times every database path the screens take, through services, against a
+# generated database. Each case runs `--runs` times after a warm-up and is
+# reported as p50/p95/p99 milliseconds in JSON, so two runs can be diffed.
+#
+#   python -m benchmarks.run_benchmarks --scale 0.01 --out results.json
+
+DEFAULT_DB = os.path.join("benchmarks", "bench.db")
+RUNS = 200
+WARMUP = 20
+# Check-ins are written past the generated data and removed afterwards
+CHECKIN_EPOCH = datetime(2100, 1, 1, 9, 0, 0)
+
+
+def _percentiles(samples):
+    millis = [ns / 1e6 for ns in samples]
+    cuts = statistics.quantiles(millis, n=100, method="inclusive") if len(millis) > 1 else millis * 99
+    return {"runs": len(millis),
+            "mean_ms": round(statistics.fmean(millis), 4),
+            "p50_ms": round(cuts[49], 4),
+            "p95_ms": round(cuts[94], 4),
+            "p99_ms": round(cuts[98], 4),
+            "max_ms": round(max(millis), 4)}
+
+
+def _time(case, runs, warmup):
+    for i in range(warmup):
+        case(i)
+    samples = []
+    for i in range(warmup, warmup + runs):
+        started = time.perf_counter_ns()
+        case(i)
+        samples.append(time.perf_counter_ns() - started)
+    return _percentiles(samples)
+
+
+def _cases(rng, employees):
+    # name -> callable(i); i is the run number, for cases that need a
+    # fresh value per call.
+    def employee():
+        return rng.randint(1, employees)
+
+    today = date.today()
+    year_start, year_end = date_ranges.year_range(today.year - 1)
+    month_start, month_end = date_ranges.month_range(today.year - 1, 6)
+    custom_start, custom_end = date_ranges.between(
+        (today - timedelta(days=45)).isoformat(), (today - timedelta(days=10)).isoformat())
+
+    def history(start, end, pages=1):
+        def run(i):
+            employee_id = employee()
+            rows = services.attendance_history_page(employee_id, start, end)
+            for _ in range(pages - 1):
+                if not rows:
+                    break
+                rows = services.attendance_history_page(
+                    employee_id, start, end, after=services.attendance_row_key(rows[-1]))
+        return run
+
+    def pending_pages(pages):
+        def run(i):
+            rows = services.pending_leave_page()
+            for _ in range(pages - 1):
+                if not rows:
+                    break
+                rows = services.pending_leave_page(after=services.pending_leave_row_key(rows[-1]))
+        return run
+
+    def employee_pages(pages):
+        def run(i):
+            rows = services.employee_page()
+            for _ in range(pages - 1):
+                if not rows:
+                    break
+                rows = services.employee_page(after=services.employee_row_key(rows[-1]))
+        return run
+
+    def batch_check_in(i, size=100):
+        when = CHECKIN_EPOCH + timedelta(days=100_000 + i)
+        services.batch_check_in([(employee_id, when) for employee_id in range(1, size + 1)])
+
+    return {
+        "login.admin": lambda i: services.authenticate_admin("admin", "admin123"),
+        "login.employee": lambda i: services.find_employee_by_email(f"employee{employee()}@example.com"),
+        "employee.get": lambda i: services.get_employee(employee()),
+        "employee.first_page": employee_pages(1),
+        "employee.five_pages": employee_pages(5),
+        "employee.search": lambda i: services.search_employees(f"employee {str(employee())[:2]}"),
+        "checkin.single": lambda i: services.check_in(employee(), CHECKIN_EPOCH + timedelta(days=i)),
+        "checkin.repeat": lambda i: services.check_in(1, CHECKIN_EPOCH),
+        "checkin.batch_100": batch_check_in,
+        "history.all.first_page": history(date_ranges.MIN_DATE, date_ranges.MAX_DATE),
+        "history.all.three_pages": history(date_ranges.MIN_DATE, date_ranges.MAX_DATE, 3),
+        "history.year": history(year_start, year_end),
+        "history.month": history(month_start, month_end),
+        "history.custom_range": history(custom_start, custom_end),
+        "counts.employee.all": lambda i: services.attendance_counts(
+            employee(), date_ranges.MIN_DATE, date_ranges.MAX_DATE),
+        "counts.employee.year": lambda i: services.attendance_counts(employee(), year_start, year_end),
+        "counts.company.month": lambda i: services.company_attendance_counts(month_start, month_end),
+        "streaks.employee.all": lambda i: services.attendance_streaks(
+            employee(), date_ranges.MIN_DATE, date_ranges.MAX_DATE),
+        "streaks.employee.year": lambda i: services.attendance_streaks(employee(), year_start, year_end),
+        "heatmap.month": lambda i: attendance_heatmap.load(month_start, month_end),
+        "heatmap.year": lambda i: attendance_heatmap.load(year_start, year_end),
+        "leaves.pending.first_page": pending_pages(1),
+        "leaves.pending.five_pages": pending_pages(5),
+        "leaves.history.first_page": lambda i: services.leave_history_page(employee()),
+        "summary.month_page": lambda i: services.monthly_summary_page(today.year - 1, 6),
+    }
+
+
+def _remove_benchmark_writes():
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM attendance WHERE date >= ?",
+                     (date_codec.codec().stamp(CHECKIN_EPOCH)[0],))
+
+
+def run(path, runs=RUNS, warmup=WARMUP, only=None, seed=42):
+    db.set_database_path(path)
+    conn = db.get_connection()
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("employees", "attendance", "leaves")}
+    rng = random.Random(seed)
+    results = {}
+    try:
+        for name, case in _cases(rng, counts["employees"]).items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            results[name] = _time(case, runs, warmup)
+    finally:
+        _remove_benchmark_writes()
+
+    return {
+        "database": os.path.abspath(path),
+        "rows": counts,
+        "integer_dates": date_codec.codec().integer,
+        "runs": runs,
+        "warmup": warmup,
+        "seed": seed,
+        "sqlite": sqlite3.sqlite_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the attendance system's queries.")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"database to benchmark (default {DEFAULT_DB})")
+    parser.add_argument("--generate", action="store_true",
+                        help="(re)generate the database first, even if it exists")
+    parser.add_argument("--scale", type=float, default=1.0, help="data scale when generating")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--integer-dates", action="store_true",
+                        help="generate with integer attendance dates (date_codec.py)")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--warmup", type=int, default=WARMUP)
+    parser.add_argument("--only", nargs="*", help="case name prefixes to run, e.g. history stats")
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    if args.generate or not os.path.exists(args.db):
+        generate(args.db, args.scale, args.seed, integer_dates=args.integer_dates)
+    report = run(args.db, args.runs, args.warmup, args.only, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,106 @@
+import sqlite3
+import sys
+
+import db
+import queries
+
+# ---------- Change Watcher ----------
+# Open dashboards pick up writes made anywhere (another window, another
+# workstation, a kiosk, the import job) without anyone clicking Refresh.
+# Each poll is a single PRAGMA data_version on a private connection, which
+# SQLite answers from the shared WAL index without reading any pages. Only
+# when it moves are the per-table counters (newest change_log seq of each
+# table) read, and only subscribers of tables that changed are called.
+
+POLL_MS = 2000
+
+
+class ChangeWatcher:
+    def __init__(self, root, interval_ms=POLL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._conn = None
+        self._data_version = None
+        self._versions = {}         # watched table -> last seen counter
+        self._subscriptions = []
+        self._after_id = None
+
+    def watch(self, tables, callback, owner=None):
+        # callback() runs on the Tk thread after any of `tables` changed.
+        # While `owner` is hidden (e.g. a notebook tab in the background)
+        # the call waits until it is shown again; once it is destroyed the
+        # subscription is dropped.
+        subscription = {"tables": set(tables), "callback": callback,
+                        "owner": owner, "pending": False}
+        self._subscriptions.append(subscription)
+        for table in tables:
+            if table not in self._versions:
+                # Baseline now, so the first change after this is noticed
+                self._versions[table] = self._read(queries.TABLE_VERSION, (table,)) or 0
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._poll)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---------- Polling ----------
+    def _read(self, sql, params=()):
+        # The private connection is closed by db.close_all() when the
+        # database is switched; reopen it then.
+        for attempt in (1, 2):
+            if self._conn is None:
+                self._conn = db.open_connection()
+            try:
+                return self._conn.execute(sql, params).fetchone()[0]
+            except sqlite3.ProgrammingError:
+                if attempt == 2:
+                    raise
+                self._conn = None
+                self._data_version = None
+
+    def changed_tables(self):
+        # Tables whose counter moved since the last call; cheap when
+        # nothing was committed.
+        data_version = self._read("PRAGMA data_version")
+        if data_version == self._data_version:
+            return set()
+        self._data_version = data_version
+        changed = set()
+        for table, seen in self._versions.items():
+            version = self._read(queries.TABLE_VERSION, (table,)) or 0
+            if version != seen:
+                changed.add(table)
+            self._versions[table] = version
+        return changed
+
+    def _poll(self):
+        self._after_id = None
+        try:
+            changed = self.changed_tables()
+        except sqlite3.Error:
+            changed = set()     # locked or being replaced; try next time
+        try:
+            for subscription in list(self._subscriptions):
+                owner = subscription["owner"]
+                if owner is not None and not owner.winfo_exists():
+                    self._subscriptions.remove(subscription)
+                    continue
+                if subscription["tables"] & changed:
+                    subscription["pending"] = True
+                if subscription["pending"] and (owner is None or owner.winfo_viewable()):
+                    subscription["pending"] = False
+                    try:
+                        subscription["callback"]()
+                    except Exception:
+                        # Reported like any Tk callback error; the other
+                        # subscribers still run
+                        self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self.start()
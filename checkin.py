@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from db import get_connection, transaction
+import queries
+import date_codec
+
+# ---------- Check-In ----------
+
+def check_in(employee_id, when=None):
+    # Records the employee as present for the day of `when` (default now).
+    # Returns False if the day was already marked.
+    when = when or datetime.now()
+    cursor = get_connection().cursor()
+    cursor.execute(queries.CHECK_IN, (employee_id, *date_codec.codec().stamp(when)))
+    return cursor.rowcount == 1
+
+
+def batch_check_in(checkins):
+    # Records many (employee_id, datetime) check-ins in one transaction, as a
+    # kiosk or badge reader flushing its buffer. Days already marked and
+    # unknown employees are skipped. Returns (recorded, skipped).
+    stamp = date_codec.codec().stamp
+    rows = [(employee_id, *stamp(when), employee_id) for employee_id, when in checkins]
+    if not rows:
+        return 0, 0
+    with transaction() as conn:
+        # rowcount, unlike total_changes, leaves out trigger writes
+        recorded = conn.executemany(queries.BATCH_CHECK_IN, rows).rowcount
+    return recorded, len(rows) - recorded
+
+
+def group_check_in(checkins):
+    # Like batch_check_in(), but with each check-in's own result (True if
+    # recorded) for callers answering many clients from one commit, such
+    # as the check-in server's writer. One transaction, so one fsync.
+    stamp = date_codec.codec().stamp
+    results = []
+    with transaction() as conn:
+        cursor = conn.cursor()
+        for employee_id, when in checkins:
+            cursor.execute(queries.BATCH_CHECK_IN, (employee_id, *stamp(when), employee_id))
+            results.append(cursor.rowcount == 1)
+    return results
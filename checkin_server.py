@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import json
+import signal
+import statistics
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import db
+import database_setup
+import services
+
+# ---------- Check-In Server ----------
+# HTTP/JSON endpoint for the entrance kiosks, on the existing attendance
+# schema, so check-in no longer needs the Tk GUI:
+#
+#   POST /checkin  {"employee_id": 12}                  -> check in now
+#   POST /checkin  {"employee_id": 12, "time": "2026-03-02T08:59:41"}
+#   GET  /stats    latency percentiles and group-commit batch sizes
+#   GET  /health
+#
+# Requests are parsed on the event loop and queue their check-in for a
+# single writer. Whenever the writer is free it takes everything queued
+# (up to MAX_BATCH) and records it in one transaction on its own thread,
+# so a burst at 9:00 costs one commit per batch instead of one per
+# employee, and no two writers contend for SQLite's lock. Unknown
+# employees are answered from a snapshot of employee ids without reaching
+# the writer; the snapshot is reloaded on a worker thread, so the event
+# loop itself never waits on SQLite.
+#
+#   python checkin_server.py --host 0.0.0.0 --port 8765
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BATCH = 500             # check-ins per commit
+MAX_QUEUE = 5000            # queued check-ins before new ones get 503
+MAX_BODY = 4096             # bytes; a check-in is a few dozen
+LATENCY_WINDOW = 10_000     # latest requests kept for the percentiles
+REPORT_EVERY = 10.0         # seconds between stats lines on stdout
+DIRECTORY_RELOAD = 5.0      # seconds; least time between directory reloads
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _size_buckets(sizes):
+    # {"1": n, "2-3": n, "4-7": n, ...} commits per power-of-two size range
+    buckets = Counter()
+    for size, count in sizes.items():
+        low = 1 << (size.bit_length() - 1)
+        buckets[low] += count
+    return {(str(low) if low == 1 else f"{low}-{2 * low - 1}"): count
+            for low, count in sorted(buckets.items())}
+
+
+class ServerStats:
+    # Rolling request latencies and the size of every commit.
+    def __init__(self):
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)      # seconds
+        self.batch_sizes = Counter()
+        self.responses = Counter()                          # status -> count
+        self.recorded = 0
+        self.already_marked = 0
+
+    def request(self, status, seconds):
+        self.responses[status] += 1
+        self.latencies.append(seconds)
+
+    def batch(self, results):
+        self.batch_sizes[len(results)] += 1
+        recorded = sum(results)
+        self.recorded += recorded
+        self.already_marked += len(results) - recorded
+
+    def snapshot(self):
+        millis = [seconds * 1000 for seconds in self.latencies]
+        cuts = (statistics.quantiles(millis, n=100, method="inclusive") if len(millis) > 1
+                else millis * 99)
+        batches = sum(self.batch_sizes.values())
+        checkins = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "requests": sum(self.responses.values()),
+            "responses": {str(status): count for status, count in sorted(self.responses.items())},
+            "recorded": self.recorded,
+            "already_marked": self.already_marked,
+            "latency_ms": {"window": len(millis),
+                           "p50": round(cuts[49], 3) if cuts else None,
+                           "p95": round(cuts[94], 3) if cuts else None,
+                           "p99": round(cuts[98], 3) if cuts else None,
+                           "max": round(max(millis), 3) if millis else None},
+            "batches": {"commits": batches,
+                        "mean_size": round(checkins / batches, 2) if batches else None,
+                        "max_size": max(self.batch_sizes, default=None),
+                        "sizes": _size_buckets(self.batch_sizes)},
+        }
+
+    def line(self):
+        snapshot = self.snapshot()
+        latency, batches = snapshot["latency_ms"], snapshot["batches"]
+        return (f"{snapshot['requests']} requests, {snapshot['recorded']} recorded | "
+                f"p50 {latency['p50']} ms, p99 {latency['p99']} ms | "
+                f"{batches['commits']} commits, mean batch {batches['mean_size']}, "
+                f"max {batches['max_size']}")
+
+
+def _reload_employee_ids():
+    # Runs on a worker thread.
+    services.invalidate_employee_cache()
+    return services.employee_ids()
+
+
+class CheckInServer:
+    def __init__(self, max_batch=MAX_BATCH, max_queue=MAX_QUEUE):
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.stats = ServerStats()
+        # One thread, so every write goes through one pooled connection
+        self._db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkin-writer")
+        self._writer = None
+        self._employee_ids = frozenset()
+        self._directory_loaded = 0.0
+        self._reloading = None
+
+    # ---------- Writer ----------
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            checkins = [(employee_id, when) for employee_id, when, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._db_thread,
+                                                     services.group_check_in, checkins)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats.batch(results)
+            for (_, _, future), recorded in zip(batch, results):
+                if not future.done():
+                    future.set_result(recorded)
+
+    async def check_in(self, employee_id, when):
+        # True if recorded, False if the day was already marked.
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((employee_id, when, future))
+        return await future
+
+    # ---------- HTTP ----------
+    async def _route(self, method, path, body):
+        if path == "/checkin":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            return await self._post_checkin(body)
+        if path == "/stats":
+            return 200, self.stats.snapshot()
+        if path == "/health":
+            return 200, {"status": "ok", "queued": self.queue.qsize()}
+        return 404, {"error": f"no such endpoint: {path}"}
+
+    # ---------- Employee Directory ----------
+    async def _reload_directory(self):
+        self._directory_loaded = time.monotonic()
+        try:
+            self._employee_ids = await asyncio.get_running_loop().run_in_executor(
+                None, _reload_employee_ids)
+        finally:
+            self._reloading = None
+
+    async def _known(self, employee_id):
+        # An unknown id reloads the snapshot, at most every
+        # DIRECTORY_RELOAD seconds, for employees added since; requests
+        # that arrive during a reload wait for the same one.
+        if employee_id in self._employee_ids:
+            return True
+        reloading = self._reloading
+        if reloading is None:
+            if time.monotonic() - self._directory_loaded < DIRECTORY_RELOAD:
+                return False
+            reloading = self._reloading = asyncio.create_task(self._reload_directory())
+        await asyncio.shield(reloading)
+        return employee_id in self._employee_ids
+
+    async def _post_checkin(self, body):
+        try:
+            request = json.loads(body or b"null")
+            employee_id = request["employee_id"]
+            if not isinstance(employee_id, int) or isinstance(employee_id, bool):
+                raise BadRequest("employee_id must be an integer")
+            when = datetime.fromisoformat(request["time"]) if request.get("time") else datetime.now()
+        except (ValueError, TypeError, KeyError, BadRequest) as e:
+            return 400, {"error": f"expected {{\"employee_id\": <int>, \"time\": <ISO, optional>}}: {e}"}
+        try:
+            if not await self._known(employee_id):
+                return 404, {"error": "unknown employee", "employee_id": employee_id}
+            recorded = await self.check_in(employee_id, when)
+        except asyncio.QueueFull:
+            return 503, {"error": "too many check-ins queued, retry shortly"}
+        except Exception as e:
+            return 500, {"error": str(e)}
+        return 200, {"employee_id": employee_id, "recorded": recorded,
+                     "already_marked": not recorded,
+                     "date": when.strftime("%Y-%m-%d"), "time": when.strftime("%H:%M:%S")}
+
+    async def _handle(self, reader, writer):
+        # HTTP/1.1 with keep-alive; one request at a time per connection.
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (version == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload, keep_alive = 413, {"error": "body too large"}, False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._route(method, path.split("?")[0], body)
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                             f"\r\n".encode() + data)
+                await writer.drain()
+                if path == "/checkin":
+                    self.stats.request(status, time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass        # client went away or sent something that is not HTTP
+        finally:
+            writer.close()
+
+    async def _report(self, every):
+        requests = 0
+        while True:
+            await asyncio.sleep(every)
+            total = sum(self.stats.responses.values())
+            if total != requests:
+                requests = total
+                print(self.stats.line(), flush=True)
+
+    async def serve(self, host=HOST, port=PORT, report_every=REPORT_EVERY, ready=None):
+        # Runs until cancelled. ready(port) is called once listening.
+        await self._reload_directory()
+        self._writer = asyncio.create_task(self._write_batches())
+        reporter = asyncio.create_task(self._report(report_every)) if report_every else None
+        server = await asyncio.start_server(self._handle, host, port)
+        try:
+            if ready:
+                ready(server.sockets[0].getsockname()[1])
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._writer.cancel()
+            if reporter:
+                reporter.cancel()
+            self._db_thread.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON check-in endpoint for kiosks.")
+    parser.add_argument("--host", default=HOST, help=f"address to listen on (default {HOST})")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", help="database file (default: the app's)")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH,
+                        help="most check-ins recorded in one commit")
+    parser.add_argument("--report-every", type=float, default=REPORT_EVERY,
+                        help="seconds between stats lines (0 for none)")
+    args = parser.parse_args()
+
+    if args.db:
+        db.set_database_path(args.db)
+    # The upsert needs the unique (employee_id, date) index
+    database_setup.ensure_schema()
+    server = CheckInServer(max_batch=args.max_batch)
+
+    async def main():
+        # SIGTERM (a service manager stopping us) ends it like Ctrl+C
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM,
+                                                          asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass        # Windows
+        await server.serve(args.host, args.port, args.report_every,
+                           ready=lambda port: print(f"Listening on {args.host}:{port}", flush=True))
+
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    print(server.stats.line(), flush=True)
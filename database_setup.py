@@ -1,7 +1,657 @@
+import sys
 import sqlite3
+from db import get_connection, transaction, close_all, attendance_view_sql, attendance_sources
+import queries
+import date_codec
+import work_calendar
 
-def setup_database():
-    conn = sqlite3.connect("attendance_system.db")
+# ---------- Indexes ----------
+# Each index is named after the query it serves; see check_query_plans().
+INDEXES = [
+    # Attendance history per employee, newest first. Carries time and status
+    # so the history view is answered from the index alone, and its
+    # (employee_id, date) prefix serves the "already marked today?" check.
+    """CREATE INDEX IF NOT EXISTS idx_attendance_employee_date
+       ON attendance (employee_id, date DESC, time DESC, status)""",
+    # Admin leave queue: only pending rows are indexed, so the index stays
+    # tiny no matter how many approved/rejected leaves pile up. The implicit
+    # rowid suffix gives the (date, id) order the paged queue walks.
+    """CREATE INDEX IF NOT EXISTS idx_leaves_pending_date
+       ON leaves (date) WHERE status = 'Pending'""",
+    # Employee leave history, newest first. id breaks ties between
+    # requests for the same day, giving the paged history a unique key.
+    """CREATE INDEX IF NOT EXISTS idx_leaves_employee_date_id
+       ON leaves (employee_id, date DESC, id DESC)""",
+]
+# employees.email and admins.username are UNIQUE, so SQLite already keeps
+# an automatic index that serves both login lookups.
+
+
+# Indexes replaced by a better design; dropped on upgrade.
+RETIRED_INDEXES = ["idx_leaves_pending", "idx_leaves_employee_date"]
+
+
+# One attendance row per employee per day. A unique index rather than a
+# table constraint so existing files can be upgraded in place.
+CHECKIN_UNIQUE_INDEX = """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_attendance_employee_date
+    ON attendance (employee_id, date)
+"""
+
+# Keeps the earliest row of any day recorded twice before the unique
+# index existed (the old SELECT-then-INSERT check-in could race).
+DEDUPLICATE_ATTENDANCE = """
+    DELETE FROM attendance
+    WHERE id NOT IN (SELECT MIN(id) FROM attendance GROUP BY employee_id, date)
+"""
+
+
+def create_indexes(cursor):
+    for name in RETIRED_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    for statement in INDEXES:
+        cursor.execute(statement)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'ux_attendance_employee_date'")
+    if cursor.fetchone() is None:
+        with transaction():
+            cursor.execute(DEDUPLICATE_ATTENDANCE)
+            cursor.execute(CHECKIN_UNIQUE_INDEX)
+
+
+# ---------- Monthly Summary ----------
+# attendance_monthly_summary holds per employee per month counts, kept
+# current by triggers on attendance so statistics never re-count rows.
+# The *_bits columns are the same days as bitmaps: bit d - 1 is set when
+# day d of the month has a row with that status (see attendance_bitmap.py).
+# A day has at most one row, so setting or clearing its bit is adding or
+# subtracting it, and the bitmaps update like the counts.
+SUMMARY_TABLE = """
+    CREATE TABLE IF NOT EXISTS attendance_monthly_summary (
+        employee_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        present_days INTEGER NOT NULL DEFAULT 0,
+        absent_days INTEGER NOT NULL DEFAULT 0,
+        leave_days INTEGER NOT NULL DEFAULT 0,
+        total_days INTEGER NOT NULL DEFAULT 0,
+        present_bits INTEGER NOT NULL DEFAULT 0,
+        absent_bits INTEGER NOT NULL DEFAULT 0,
+        leave_bits INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (employee_id, year, month)
+    ) WITHOUT ROWID
+"""
+BITMAP_COLUMNS = ("present_bits", "absent_bits", "leave_bits")
+
+# Company-wide view of one month.
+SUMMARY_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_summary_month
+    ON attendance_monthly_summary (year, month)
+"""
+
+
+# Year and month of an attendance date. strftime() reads both ISO text and
+# Julian day numbers, so these work under either date encoding (date_codec.py).
+def _year_of(value):
+    return f"CAST(strftime('%Y', {value}) AS INTEGER)"
+
+
+def _month_of(value):
+    return f"CAST(strftime('%m', {value}) AS INTEGER)"
+
+
+def _day_bit(value):
+    return f"(1 << (CAST(strftime('%d', {value}) AS INTEGER) - 1))"
+
+
+def _summary_delta(row, sign):
+    # Upsert adding (sign = +1) or removing (sign = -1) one attendance row.
+    return f"""
+        INSERT INTO attendance_monthly_summary
+            (employee_id, year, month, present_days, absent_days, leave_days, total_days,
+             present_bits, absent_bits, leave_bits)
+        VALUES ({row}.employee_id,
+                {_year_of(f"{row}.date")},
+                {_month_of(f"{row}.date")},
+                {sign} * ({row}.status = 'Present'),
+                {sign} * ({row}.status = 'Absent'),
+                {sign} * ({row}.status = 'On Leave'),
+                {sign},
+                {sign} * ({row}.status = 'Present') * {_day_bit(f"{row}.date")},
+                {sign} * ({row}.status = 'Absent') * {_day_bit(f"{row}.date")},
+                {sign} * ({row}.status = 'On Leave') * {_day_bit(f"{row}.date")})
+        ON CONFLICT (employee_id, year, month) DO UPDATE SET
+            present_days = present_days + excluded.present_days,
+            absent_days = absent_days + excluded.absent_days,
+            leave_days = leave_days + excluded.leave_days,
+            total_days = total_days + excluded.total_days,
+            present_bits = present_bits + excluded.present_bits,
+            absent_bits = absent_bits + excluded.absent_bits,
+            leave_bits = leave_bits + excluded.leave_bits;
+    """
+
+
+_DROP_EMPTY_MONTH = f"""
+        DELETE FROM attendance_monthly_summary
+        WHERE employee_id = OLD.employee_id
+          AND year = {_year_of("OLD.date")}
+          AND month = {_month_of("OLD.date")}
+          AND total_days <= 0;
+"""
+
+SUMMARY_TRIGGER_NAMES = ("trg_attendance_summary_insert", "trg_attendance_summary_delete",
+                         "trg_attendance_summary_update")
+SUMMARY_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_insert
+        AFTER INSERT ON attendance
+        BEGIN {_summary_delta("NEW", 1)} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_delete
+        AFTER DELETE ON attendance
+        BEGIN {_summary_delta("OLD", -1)} {_DROP_EMPTY_MONTH} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_update
+        AFTER UPDATE OF employee_id, date, status ON attendance
+        BEGIN {_summary_delta("OLD", -1)} {_DROP_EMPTY_MONTH} {_summary_delta("NEW", 1)} END""",
+]
+
+REBUILD_SUMMARY = f"""
+    INSERT INTO attendance_monthly_summary
+        (employee_id, year, month, present_days, absent_days, leave_days, total_days,
+         present_bits, absent_bits, leave_bits)
+    SELECT employee_id,
+           {_year_of("date")},
+           {_month_of("date")},
+           SUM(status = 'Present'),
+           SUM(status = 'Absent'),
+           SUM(status = 'On Leave'),
+           COUNT(*),
+           SUM((status = 'Present') * {_day_bit("date")}),
+           SUM((status = 'Absent') * {_day_bit("date")}),
+           SUM((status = 'On Leave') * {_day_bit("date")})
+    FROM all_attendance
+    GROUP BY 1, 2, 3
+"""
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _add_bitmap_columns(cursor):
+    # A summary from before the bitmaps gets the columns and new triggers;
+    # True when it still has to be rebuilt to fill them in.
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(attendance_monthly_summary)")}
+    missing = [column for column in BITMAP_COLUMNS if column not in columns]
+    for column in missing:
+        cursor.execute(f"""ALTER TABLE attendance_monthly_summary
+                           ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0""")
+    if missing:
+        for name in SUMMARY_TRIGGER_NAMES:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    return bool(missing)
+
+
+def create_monthly_summary(cursor):
+    # Returns True when the table is new (or gained the bitmap columns)
+    # and still has to be backfilled.
+    created = not _table_exists(cursor, "attendance_monthly_summary")
+    cursor.execute(SUMMARY_TABLE)
+    created = _add_bitmap_columns(cursor) or created
+    cursor.execute(SUMMARY_INDEX)
+    for statement in SUMMARY_TRIGGERS:
+        cursor.execute(statement)
+    return created
+
+
+def rebuild_monthly_summary():
+    # Recompute every month from attendance (archived years included), e.g.
+    # after a bulk load that bypassed the triggers or to repair drift.
+    with transaction() as conn:
+        conn.execute("DELETE FROM attendance_monthly_summary")
+        conn.execute(REBUILD_SUMMARY)
+
+
+# ---------- Change Log ----------
+# Every insert, update and delete on these tables appends (table, row id)
+# to change_log, so an open list can fetch just the rows changed since it
+# last looked instead of reloading everything. seq only ever grows; old
+# entries are pruned on start-up and a reader that fell behind the pruned
+# prefix reloads in full (see services.ChangeFeed).
+CHANGE_LOGGED_TABLES = ["employees", "leaves", "attendance"]
+CHANGE_LOG_KEEP = 100_000
+
+CHANGE_LOG_TABLE = """
+    CREATE TABLE IF NOT EXISTS change_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL
+    )
+"""
+
+# Changes of one table after a given seq.
+CHANGE_LOG_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_change_log_table_seq
+    ON change_log (table_name, seq)
+"""
+
+PRUNE_CHANGE_LOG = """
+    DELETE FROM change_log
+    WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?
+"""
+
+
+def _change_log_triggers(table):
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        yield f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_change_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id) VALUES ('{table}', {row}.id);
+            END"""
+
+
+def create_change_log(cursor):
+    cursor.execute(CHANGE_LOG_TABLE)
+    cursor.execute(CHANGE_LOG_INDEX)
+    for table in CHANGE_LOGGED_TABLES:
+        for statement in _change_log_triggers(table):
+            cursor.execute(statement)
+
+
+# ---------- Employee Search ----------
+# FTS5 index over the searchable employee columns. It is an external
+# content table (the text lives only in employees), kept in step by
+# triggers. prefix= keeps 2- and 3-character prefix indexes, so
+# search-as-you-type prefixes do not expand over the whole term list.
+EMPLOYEE_SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS employee_search USING fts5(
+        name, email, phone, role,
+        content = 'employees', content_rowid = 'id', prefix = '2 3'
+    )
+"""
+
+_SEARCH_INSERT = """
+    INSERT INTO employee_search (rowid, name, email, phone, role)
+    VALUES (NEW.id, NEW.name, NEW.email, NEW.phone, NEW.Role);
+"""
+_SEARCH_DELETE = """
+    INSERT INTO employee_search (employee_search, rowid, name, email, phone, role)
+    VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone, OLD.Role);
+"""
+
+EMPLOYEE_SEARCH_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS trg_employees_search_insert
+        AFTER INSERT ON employees
+        BEGIN {_SEARCH_INSERT} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_employees_search_delete
+        AFTER DELETE ON employees
+        BEGIN {_SEARCH_DELETE} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_employees_search_update
+        AFTER UPDATE OF id, name, email, phone, Role ON employees
+        BEGIN {_SEARCH_DELETE} {_SEARCH_INSERT} END""",
+]
+
+
+def create_employee_search(cursor):
+    # Returns True when the index is new and still has to be built.
+    created = not _table_exists(cursor, "employee_search")
+    cursor.execute(EMPLOYEE_SEARCH_TABLE)
+    for statement in EMPLOYEE_SEARCH_TRIGGERS:
+        cursor.execute(statement)
+    return created
+
+
+def rebuild_employee_search():
+    # Re-index every employee, e.g. after a bulk load without triggers.
+    with transaction() as conn:
+        conn.execute("INSERT INTO employee_search (employee_search) VALUES ('rebuild')")
+
+
+# ---------- Calendar ----------
+# One row per day (see work_calendar.py). working_before counts the working
+# days strictly before the row's date, so the working days in any range are
+# one subtraction of two lookups instead of a count.
+CALENDAR_TABLE = """
+    CREATE TABLE IF NOT EXISTS calendar (
+        date TEXT PRIMARY KEY,              -- 'YYYY-MM-DD'
+        day INTEGER NOT NULL UNIQUE,        -- Julian day number (date_codec.py)
+        weekday INTEGER NOT NULL,           -- 0 = Monday
+        weekday_name TEXT NOT NULL,
+        working INTEGER NOT NULL,           -- 0 on weekends and public holidays
+        holiday TEXT,                       -- name of the public holiday
+        working_before INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+"""
+
+
+def create_calendar(cursor):
+    cursor.execute(CALENDAR_TABLE)
+
+
+# ---------- Employee Start Dates ----------
+# employees.start_date ('YYYY-MM-DD') is the first day the end-of-day close
+# writes rows for; new employees start on the day they are added. Files
+# from before the column get each employee's first attendance day, or
+# today for employees without any.
+FIRST_ATTENDANCE_DAYS = "SELECT employee_id, MIN(date) FROM all_attendance GROUP BY employee_id"
+
+
+def add_start_dates(cursor):
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(employees)")}
+    if "start_date" in columns:
+        return
+    codec = date_codec.codec()
+    with transaction() as conn:
+        conn.execute("ALTER TABLE employees ADD COLUMN start_date TEXT")
+        first_days = [(codec.iso_date(day), employee_id) for employee_id, day in
+                      conn.execute(FIRST_ATTENDANCE_DAYS).fetchall()]
+        conn.executemany("UPDATE employees SET start_date = ? WHERE id = ?", first_days)
+        conn.execute("""UPDATE employees SET start_date = date('now', 'localtime')
+                        WHERE start_date IS NULL""")
+
+
+# ---------- Attendance Archives ----------
+# One file per archived year (see archive.py), attached as `schema`. Rows
+# keep their ids; the history index is the same as the live table's.
+def archive_table(schema, name="attendance", integer_dates=False):
+    date_type = "INTEGER" if integer_dates else "TEXT"
+    return f"""
+        CREATE TABLE IF NOT EXISTS {schema}.{name} (
+            id INTEGER PRIMARY KEY,
+            employee_id INTEGER NOT NULL,
+            date {date_type} NOT NULL,
+            time {date_type} NOT NULL,
+            status TEXT NOT NULL
+        )
+    """
+
+
+def archive_index(schema):
+    return f"""CREATE INDEX IF NOT EXISTS {schema}.idx_attendance_employee_date
+               ON attendance (employee_id, date DESC, time DESC, status)"""
+
+
+def archive_schema(schema, integer_dates=False):
+    return [archive_table(schema, integer_dates=integer_dates), archive_index(schema)]
+
+
+# ---------- Integer Dates ----------
+# Optional compact encoding of attendance.date/time (see date_codec.py).
+def attendance_table(name="attendance", integer_dates=False):
+    date_type = "INTEGER" if integer_dates else "TEXT"
+    return f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            date {date_type} NOT NULL,
+            time {date_type} NOT NULL,
+            status TEXT NOT NULL,
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        )
+    """
+
+
+# julianday() of an ISO day is its midnight; the day number is the noon.
+ENCODED_ATTENDANCE = """
+    SELECT id, employee_id,
+           CAST(julianday(date) + 0.5 AS INTEGER),
+           substr(time, 1, 2) * 3600 + substr(time, 4, 2) * 60 + substr(time, 7, 2),
+           status
+    FROM {schema}.attendance
+"""
+
+
+def _encode_attendance(cursor, schema):
+    # Rebuild one attendance table with integer columns. The copy fires no
+    # triggers and the old table's triggers and indexes go with it.
+    live = schema == "main"
+    if live:
+        # Keep AUTOINCREMENT from reusing ids of rows deleted at the end
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'attendance'")
+        sequence = cursor.fetchone()
+        cursor.execute(attendance_table("attendance_encoded", integer_dates=True))
+    else:
+        cursor.execute(archive_table(schema, "attendance_encoded", integer_dates=True))
+    cursor.execute(f"INSERT INTO {schema}.attendance_encoded "
+                   + ENCODED_ATTENDANCE.format(schema=schema))
+    cursor.execute(f"DROP TABLE {schema}.attendance")
+    cursor.execute(f"ALTER TABLE {schema}.attendance_encoded RENAME TO attendance")
+    if live:
+        if sequence is not None:
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'attendance'",
+                           sequence)
+        create_indexes(cursor)
+        create_monthly_summary(cursor)
+        create_change_log(cursor)
+    else:
+        cursor.execute(archive_index(schema))
+
+
+def migrate_to_integer_dates():
+    # Run with the app closed. Archives are converted first and the live
+    # table last; each table is converted in its own transaction and
+    # skipped once done, so an interrupted run is finished by rerunning.
+    conn = get_connection()
+    cursor = conn.cursor()
+    schemas = [source.split(".")[0] for source in attendance_sources(conn)]
+    for schema in reversed(schemas):
+        if date_codec.integer_dates(conn, schema):
+            continue
+        with transaction():
+            # The view would block renaming a table it reads from
+            cursor.execute("DROP VIEW IF EXISTS temp.all_attendance")
+            _encode_attendance(cursor, schema)
+        print(f"{schema}.attendance now stores integer dates.")
+    close_all()
+    date_codec.forget()
+
+
+# ---------- Upgrades ----------
+# PRAGMA user_version records the schema a file was last upgraded to, so
+# start-up can skip upgrade_schema() on a file that is already current.
+# Bump SCHEMA_VERSION whenever upgrade_schema() gains something an
+# existing file needs.
+SCHEMA_VERSION = 2
+
+
+def schema_current():
+    return get_connection().execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION
+
+
+def upgrade_schema():
+    # Non-destructive: adds whatever indexes, tables and triggers the file
+    # lacks and backfills the new ones.
+    cursor = get_connection().cursor()
+    create_indexes(cursor)
+    if create_monthly_summary(cursor):
+        rebuild_monthly_summary()
+    create_change_log(cursor)
+    if create_employee_search(cursor):
+        rebuild_employee_search()
+    create_calendar(cursor)
+    add_start_dates(cursor)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def ensure_schema():
+    # For entry points other than the app (imports, cron jobs, the check-in
+    # server), which may be the first to open a file since an upgrade.
+    if not schema_current():
+        upgrade_schema()
+
+
+def routine_maintenance():
+    # Upkeep nothing waits on: extends the calendar into a new year and
+    # prunes old change_log entries. The app runs it in the background.
+    work_calendar.ensure_calendar()
+    with transaction() as conn:
+        conn.execute(PRUNE_CHANGE_LOG, (CHANGE_LOG_KEEP,))
+
+
+def upgrade_database():
+    # Non-destructive: safe to run against any existing file.
+    upgrade_schema()
+    routine_maintenance()
+
+
+# ---------- Query Plan Check ----------
+# (name, sql, sample params, full scan allowed). Queries that list a whole
+# table (or a whole partial index) are allowed to scan it; everything else
+# must be served by index searches.
+CHECKED_QUERIES = [
+    ("admin login", queries.ADMIN_LOGIN, ("admin", "admin123"), False),
+    ("employee directory", queries.ALL_EMPLOYEES, (), True),
+    ("delete employee", queries.DELETE_EMPLOYEE, (1,), False),
+    ("decide pending leave", queries.DECIDE_PENDING_LEAVE, ("Approved", 1), False),
+    ("count matching pending leaves", queries.COUNT_PENDING_LEAVES_MATCHING,
+     {"start": "2024-01-01", "end": "2024-02-01", "role": "HR"}, False),
+    ("decide matching pending leaves", queries.DECIDE_PENDING_LEAVES_MATCHING,
+     {"start": "2024-01-01", "end": "2024-02-01", "role": "HR", "status": "Approved"}, False),
+    ("summary bitmaps", queries.SUMMARY_BITS, (1, 2024, 1, 2024, 2), False),
+    ("first summary month", queries.FIRST_SUMMARY_MONTH, (1,), False),
+    # Exports stream every row in index order, so no temp sort is needed
+    ("attendance export", queries.ATTENDANCE_EXPORT.format(attendance="main.attendance"),
+     {"start": "2024-01-01", "end": "2025-01-01", "role": None, "employee_id": None}, True),
+    ("leave export", queries.LEAVE_EXPORT,
+     {"start": "2024-01-01", "end": "2025-01-01", "role": None, "employee_id": None}, True),
+    ("check-in", queries.CHECK_IN, (1, "2024-01-01", "09:00:00"), False),
+    ("batch check-in", queries.BATCH_CHECK_IN, (1, "2024-01-01", "09:00:00", 1), False),
+    # Every employee gets a row for the closed day, so employees is scanned.
+    ("close day", queries.CLOSE_DAY,
+     {"day": "2024-01-02", "day_iso": "2024-01-02", "time": "00:00:00"}, True),
+    ("working days", queries.WORKING_DAYS, ("2024-01-01", "2024-02-01"), False),
+    # The heatmap takes every employee's rows, one index seek each
+    ("heatmap attendance",
+     queries.HEATMAP_ATTENDANCE.format(attendance="main.attendance", day="a.date"),
+     {"first": 0, "start": "2024-01-01", "end": "2025-01-01"}, True),
+    ("calendar days", queries.CALENDAR_DAYS, ("2024-01-01", "2025-01-01"), False),
+    ("off days", queries.OFF_DAYS, ("2024-01-01", "2025-01-01"), False),
+    ("approved leave days", queries.APPROVED_LEAVE_DAYS, (1, "2024-01-01", "2025-01-01"),
+     False),
+    ("change log position", queries.CHANGE_LOG_POSITION, (), False),
+    ("change log start", queries.CHANGE_LOG_START, (), False),
+    ("table version", queries.TABLE_VERSION, ("leaves",), False),
+    ("changed row ids", queries.CHANGED_ROW_IDS, ("leaves", 1, 2), False),
+]
+
+
+def _pager_checks(name, pager, params, key, first_page_scans=False):
+    # First page, next page and previous page of a keyset-paged list. Only
+    # the first page may start with a scan (stopped by LIMIT); the others
+    # seek to their key.
+    return [
+        (f"{name} (first page)", pager.sql(), (*params, 1), first_page_scans),
+        (f"{name} (next page)", pager.sql(after=True), (*params, *key, 1), False),
+        (f"{name} (previous page)", pager.sql(before=True), (*params, *key, 1), False),
+    ]
+
+
+# The first employee page walks the rowid B-tree in order and stops at LIMIT.
+CHECKED_QUERIES += _pager_checks("employee pages", queries.EMPLOYEE_PAGES, (), (1,),
+                                 first_page_scans=True)
+CHECKED_QUERIES += _pager_checks("employee search pages", queries.EMPLOYEE_SEARCH_PAGES,
+                                 ('"kus"*',), (1,))
+# Likewise the first pending page walks the partial index up to LIMIT.
+CHECKED_QUERIES += _pager_checks("pending leave pages", queries.PENDING_LEAVE_PAGES,
+                                 (), ("2024-01-01", 1), first_page_scans=True)
+CHECKED_QUERIES += _pager_checks("monthly summary pages", queries.MONTHLY_SUMMARY_PAGES,
+                                 (2024, 1), (1,))
+CHECKED_QUERIES += _pager_checks("leave history pages", queries.LEAVE_HISTORY_PAGES,
+                                 (1,), ("2024-01-15", 1))
+CHECKED_QUERIES += _pager_checks("attendance history pages", queries.ATTENDANCE_HISTORY_PAGES,
+                                 (1, "2024-01-01", "2024-02-01"), ("2024-01-15", "09:00:00"))
+
+# Changed rows re-read by id for a diff refresh.
+CHECKED_QUERIES += [
+    ("changed employees", queries.EMPLOYEE_PAGES.ids_sql(), ("[1]",), False),
+    ("changed search results", queries.EMPLOYEE_SEARCH_PAGES.ids_sql(), ('"kus"*', "[1]"), False),
+    ("changed pending leaves", queries.PENDING_LEAVE_PAGES.ids_sql(), ("[1]",), False),
+    ("changed leave history", queries.LEAVE_HISTORY_PAGES.ids_sql(), (1, "[1]"), False),
+    ("changed attendance history", queries.ATTENDANCE_HISTORY_PAGES.ids_sql(),
+     (1, "2024-01-01", "2024-02-01", "[1]"), False),
+]
+
+
+def plan_problems(cursor, sql, params, allow_scan=False):
+    problems = []
+    subqueries = set()
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    for row in cursor.fetchall():
+        detail = row[-1]
+        if detail.startswith(("CO-ROUTINE ", "MATERIALIZE ")):
+            subqueries.add(detail.split()[1])
+            continue
+        if detail.startswith("SCAN ") and detail.split()[1] in subqueries:
+            continue        # reading back a view's rows; its own steps are checked
+        if detail == "SCAN CONSTANT ROW" or detail.endswith(" CONSTANT ROWS"):
+            continue        # INSERT ... SELECT of bound values, or a VALUES list
+        if detail.startswith("SCAN json_each"):
+            continue        # the bound list of ids in fetch_ids()
+        if "VIRTUAL TABLE INDEX" in detail and ":M" in detail:
+            continue        # FTS5 full-text MATCH
+        # SCAN ... USING [COVERING] INDEX still reads the whole index; only
+        # queries that list a whole table may scan
+        if detail.startswith("SCAN") and not allow_scan:
+            problems.append(detail)
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+
+def _schema_copy():
+    # Plans are checked against an empty copy of the live schema so the
+    # verdict depends on the indexes, not on the statistics of whatever
+    # (possibly tiny) data the file happens to hold.
+    memory = sqlite3.connect(":memory:")
+    rows = get_connection().execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+        ORDER BY type = 'table' DESC
+    """).fetchall()
+    virtual = [name for name, sql in rows if sql.startswith("CREATE VIRTUAL TABLE")]
+    for name, sql in rows:
+        if any(name.startswith(table + "_") for table in virtual):
+            continue    # FTS5 shadow tables; the virtual table creates them
+        memory.execute(sql)
+    # One empty archive, so all_attendance is checked as the UNION ALL it
+    # becomes once a year has been archived.
+    memory.execute("ATTACH DATABASE ':memory:' AS archive_0")
+    for statement in archive_schema("archive_0", date_codec.integer_dates(memory)):
+        memory.execute(statement)
+    memory.execute(attendance_view_sql(["main", "archive_0"]))
+    return memory
+
+
+def _counts_checks(integer_dates):
+    # work_calendar.attendance_counts() as it runs on a schema with this
+    # date encoding and one archive.
+    day = date_codec.day_number if integer_dates else str
+    params = {"start": day("2024-01-01"), "end": day("2024-02-01"), "until": day("2024-02-01"),
+              "start_date": "2024-01-01", "end_date": "2024-02-01", "employee_id": 1}
+    checks = []
+    for label, one_employee in (("one employee", True), ("all employees", False)):
+        spans, leave_days, counts = work_calendar.counts_sql(
+            ["main.attendance", "archive_0.attendance"], integer_dates, one_employee)
+        # Company-wide counts walk every employee's rows in id order
+        checks += [(f"attendance spans ({label})", spans, params, not one_employee),
+                   (f"unrecorded leave days ({label})", leave_days, params, not one_employee)]
+        checks += [(f"attendance counts ({label}, {source})", sql, params, not one_employee)
+                   for source, sql in zip(("main", "archive"), counts)]
+    return checks
+
+
+def check_query_plans():
+    memory = _schema_copy()
+    cursor = memory.cursor()
+    checks = CHECKED_QUERIES + _counts_checks(date_codec.integer_dates(memory))
+    failures = []
+    for name, sql, params, allow_scan in checks:
+        for detail in plan_problems(cursor, sql, params, allow_scan):
+            failures.append(f"{name}: {detail}")
+    assert not failures, "Queries not served by an index:\n" + "\n".join(failures)
+    print(f"All {len(checks)} queries use an index.")
+
+
+def setup_database(integer_dates=False):
+    conn = get_connection()
     cursor = conn.cursor()
 
     # Create admins table
@@ -21,7 +671,8 @@ def setup_database():
             email TEXT UNIQUE NOT NULL,
             phone TEXT NOT NULL,
             Gender TEXT NOT NULL,
-            Role TEXT NOT NULL
+            Role TEXT NOT NULL,
+            start_date TEXT
         )
     """)
 
@@ -41,16 +692,18 @@ def setup_database():
     cursor.execute("DROP TABLE IF EXISTS attendance")
     
     # Create attendance table with time column
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS attendance (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            employee_id INTEGER NOT NULL,
-            date TEXT NOT NULL,
-            time TEXT NOT NULL,
-            status TEXT NOT NULL,
-            FOREIGN KEY (employee_id) REFERENCES employees(id)
-        )
-    """)
+    cursor.execute(attendance_table(integer_dates=integer_dates))
+
+    create_indexes(cursor)
+    create_monthly_summary(cursor)
+    rebuild_monthly_summary()
+    create_change_log(cursor)
+    create_employee_search(cursor)
+    rebuild_employee_search()
+    create_calendar(cursor)
+    add_start_dates(cursor)
+    work_calendar.ensure_calendar()
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
     # Insert default admin (optional)
     cursor.execute("""
@@ -58,9 +711,18 @@ def setup_database():
         VALUES (?, ?)
     """, ("admin", "admin123"))
 
-    conn.commit()
-    conn.close()
     print("Database tables created successfully.")
 
 if __name__ == "__main__":
-    setup_database()
+    if "--check-plans" in sys.argv:
+        upgrade_database()
+        check_query_plans()
+    elif "--rebuild-summary" in sys.argv:
+        upgrade_database()
+        rebuild_monthly_summary()
+        print("Monthly attendance summary rebuilt.")
+    elif "--integer-dates" in sys.argv:
+        upgrade_database()
+        migrate_to_integer_dates()
+    else:
+        setup_database()
@@ -0,0 +1,121 @@
+from datetime import date
+from functools import lru_cache
+
+import db
+from db import get_connection
+from date_ranges import MIN_DATE
+
+# ---------- Attendance Date Encoding ----------
+# attendance.date and attendance.time are stored either as ISO text
+# ('2024-01-15', '09:05:00'; the original schema) or, after
+# `python -m database_setup --integer-dates`, as integers: the Julian day
+# number of the date and the seconds since midnight. Integer rows and
+# index entries are smaller and need no parsing to display. Julian day
+# numbers are what SQLite's date functions read, so strftime('%Y', date)
+# in the summary triggers works under either encoding.
+#
+# Code that binds or reads attendance dates goes through codec(), which
+# knows the encoding of the open database. Leaves keep ISO text.
+
+JULIAN_OFFSET = 1721425     # Julian day number minus date.toordinal()
+
+
+def day_number(iso):
+    return date.fromisoformat(iso).toordinal() + JULIAN_OFFSET
+
+
+def iso_day(number):
+    return date.fromordinal(number - JULIAN_OFFSET).isoformat()
+
+
+def seconds(clock_text):
+    hours, minutes, secs = (clock_text.split(":") + ["0"])[:3]
+    return int(hours) * 3600 + int(minutes) * 60 + int(secs)
+
+
+def clock(total):
+    return f"{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}"
+
+
+class TextDates:
+    integer = False
+
+    def stamp(self, when):
+        return when.strftime("%Y-%m-%d"), when.strftime("%H:%M:%S")
+
+    def date(self, iso):
+        return iso
+
+    def time(self, clock_text):
+        return clock_text
+
+    def range(self, start, end):
+        return start, end
+
+    def iso_date(self, value):
+        return value
+
+    def iso_time(self, value):
+        return value
+
+
+class IntegerDates:
+    integer = True
+
+    def stamp(self, when):
+        return (when.toordinal() + JULIAN_OFFSET,
+                when.hour * 3600 + when.minute * 60 + when.second)
+
+    def date(self, iso):
+        return day_number(iso)
+
+    def time(self, clock_text):
+        return seconds(clock_text)
+
+    def range(self, start, end):
+        # date_ranges.MIN_DATE has no Python date; every day number is above 0
+        return (0 if start == MIN_DATE else day_number(start)), day_number(end)
+
+    def iso_date(self, value):
+        return iso_day(value)
+
+    def iso_time(self, value):
+        return clock(value)
+
+
+def integer_dates(conn, schema="main"):
+    # The encoding is the declared type of attendance.date in that schema.
+    columns = {row[1]: row[2].upper() for row in
+               conn.execute(f"PRAGMA {schema}.table_info(attendance)")}
+    return columns.get("date") == "INTEGER"
+
+
+_codecs = {}        # database path -> its codec
+
+
+def codec():
+    path = db.DB_PATH
+    if path not in _codecs:
+        _codecs[path] = IntegerDates() if integer_dates(get_connection()) else TextDates()
+    return _codecs[path]
+
+
+def forget():
+    # After a migration changed the encoding.
+    _codecs.clear()
+
+
+# ---------- Display ----------
+# Cached per stored value: a history list repeats the same few hundred
+# days and check-in times, so each is parsed and formatted once.
+@lru_cache(maxsize=4096)
+def display_date(value):
+    # ('15-01-2024', 'Monday') for a stored date of either encoding.
+    day = (date.fromordinal(value - JULIAN_OFFSET) if isinstance(value, int)
+           else date.fromisoformat(value))
+    return day.strftime("%d-%m-%Y"), day.strftime("%A")
+
+
+@lru_cache(maxsize=4096)
+def display_time(value):
+    return clock(value) if isinstance(value, int) else value
@@ -0,0 +1,52 @@
+from datetime import date, datetime, timedelta
+
+# ---------- Half-Open Date Ranges ----------
+# Every range is (start, end) as ISO 'YYYY-MM-DD' strings with start
+# inclusive and end exclusive, so it can be bound straight into
+# `date >= ? AND date < ?` and walk the (employee_id, date) index.
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# Bounds for "no limit"; they sort before/after every real ISO date.
+MIN_DATE = "0000-01-01"
+MAX_DATE = "9999-12-31"
+ALL_DATES = (MIN_DATE, MAX_DATE)
+
+
+def parse_date(text):
+    return datetime.strptime(text.strip(), DATE_FORMAT).date()
+
+
+def month_range(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+def year_range(year):
+    return date(year, 1, 1).isoformat(), date(year + 1, 1, 1).isoformat()
+
+
+def between(first_day=None, last_day=None):
+    # Inclusive calendar days as picked in the UI -> half-open range.
+    # Either end may be None (or blank) to leave that side open.
+    if isinstance(first_day, str):
+        first_day = parse_date(first_day) if first_day.strip() else None
+    if isinstance(last_day, str):
+        last_day = parse_date(last_day) if last_day.strip() else None
+    if first_day and last_day and last_day < first_day:
+        raise ValueError("End date is before start date")
+    start = first_day.isoformat() if first_day else MIN_DATE
+    end = (last_day + timedelta(days=1)).isoformat() if last_day else MAX_DATE
+    return start, end
+
+
+def month_year_range(year=None, month=None):
+    # Month/Year filter choices; None means "All".
+    if year is None and month is None:
+        return ALL_DATES
+    if year is None:
+        year = date.today().year
+    if month is None:
+        return year_range(year)
+    return month_range(year, month)
@@ -0,0 +1,159 @@
+import glob
+import os
+import re
+import sqlite3
+import threading
+import atexit
+from contextlib import contextmanager
+
+# ---------- Connection Settings ----------
+DB_PATH = "attendance_system.db"
+
+BUSY_TIMEOUT = 5.0                  # seconds to wait on a locked database
+CACHE_SIZE_KIB = 64 * 1024          # page cache per connection (64 MiB)
+MMAP_SIZE = 256 * 1024 * 1024       # memory-mapped I/O window (256 MiB)
+STATEMENT_CACHE_SIZE = 256          # prepared statements kept per connection
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_open_connections = []
+_generation = 0     # bumped by close_all() so other threads reopen lazily
+
+
+def _configure(conn):
+    cursor = conn.cursor()
+    # WAL lets readers keep going while a check-in is being written and
+    # makes commits a single sequential append instead of a journal rewrite.
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    cursor.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+
+
+# ---------- Attendance Archives ----------
+# Closed years of attendance can be moved out of the live table into one
+# file per year next to the database (see archive.py). Every connection
+# attaches those files and reads attendance through the temporary
+# all_attendance view, so history and reports see every year.
+# SQLite attaches at most 10 databases by default, hence 10 archive years.
+
+def archive_path(year, path=None):
+    base = os.path.splitext(path or DB_PATH)[0]
+    return f"{base}.archive-{int(year)}.db"
+
+
+def archive_years(path=None):
+    pattern = re.compile(r"\.archive-(\d+)\.db$")
+    base = os.path.splitext(path or DB_PATH)[0]
+    years = []
+    for name in glob.glob(glob.escape(base) + ".archive-*.db"):
+        match = pattern.search(name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years, reverse=True)
+
+
+def attendance_view_sql(schemas):
+    arms = [f"SELECT id, employee_id, date, time, status FROM {schema}.attendance"
+            for schema in schemas]
+    return "CREATE TEMP VIEW all_attendance AS " + " UNION ALL ".join(arms)
+
+
+def attendance_sources(conn):
+    # Attendance tables behind all_attendance, newest data first.
+    names = [row[1] for row in conn.execute("PRAGMA database_list")]
+    archives = sorted((name for name in names if name.startswith("archive_")), reverse=True)
+    return ["main.attendance"] + [f"{name}.attendance" for name in archives]
+
+
+def _attach_archives(conn, path):
+    schemas = ["main"]
+    for year in archive_years(path):
+        schema = f"archive_{year}"
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (archive_path(year, path),))
+        schemas.append(schema)
+    conn.execute(attendance_view_sql(schemas))
+
+
+def _open(path):
+    conn = sqlite3.connect(path,
+                           timeout=BUSY_TIMEOUT,
+                           isolation_level=None,
+                           cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
+    _configure(conn)
+    _attach_archives(conn, path)
+    with _registry_lock:
+        _open_connections.append(conn)
+    return conn
+
+
+# ---------- Public API ----------
+def get_connection():
+    """Return this thread's long-lived connection to DB_PATH, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.generation == _generation:
+        return conn
+    _local.conn = _open(DB_PATH)
+    _local.generation = _generation
+    return _local.conn
+
+
+def open_connection():
+    """Open a private connection to DB_PATH, outside the per-thread pool.
+
+    close_all() closes it too; the owner reopens it after set_database_path().
+    """
+    return _open(DB_PATH)
+
+
+@contextmanager
+def transaction(immediate=True):
+    """Run a block of writes as one transaction on this thread's connection.
+
+    Nested uses join the outermost transaction, so helpers can open one
+    without caring whether their caller already has.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def set_database_path(path):
+    """Point every thread at a different database file (used by tools and benchmarks)."""
+    global DB_PATH
+    close_all()
+    DB_PATH = path
+
+
+def _close(conn):
+    with _registry_lock:
+        if conn in _open_connections:
+            _open_connections.remove(conn)
+    try:
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+    conn.close()
+
+
+def close_all():
+    global _generation
+    with _registry_lock:
+        conns = list(_open_connections)
+        _generation += 1
+    for conn in conns:
+        _close(conn)
+
+
+atexit.register(close_all)
@@ -0,0 +1,82 @@
+import threading
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+
+from db import get_connection
+import queries
+
+# ---------- Employee Directory ----------
+# Every employee, held in memory and indexed by id and by email, so logins,
+# name lookups and the employee list are dictionary lookups instead of
+# queries. The whole table is read again on first use after invalidate(),
+# which services calls on add/delete and the change watcher calls when
+# another process changes the employees table.
+
+
+class Employee(NamedTuple):
+    id: int
+    name: str
+    email: str
+    phone: str
+    gender: str
+    role: str
+
+
+class _Snapshot:
+    def __init__(self, employees):
+        self.by_id = {employee.id: employee for employee in employees}
+        self.by_email = {employee.email: employee for employee in employees}
+        self.ids = sorted(self.by_id)
+
+
+class EmployeeDirectory:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._generation = 0
+
+    def _current(self):
+        # Readers take the snapshot reference once; a reload swaps in a new
+        # one instead of mutating, so no reader sees it half built.
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            generation = self._generation
+            rows = get_connection().execute(queries.ALL_EMPLOYEES).fetchall()
+            snapshot = _Snapshot([Employee(*row) for row in rows])
+            # Invalidated while loading: use it this once, reload next time
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        self._generation += 1
+        self._snapshot = None
+
+    def get(self, employee_id):
+        return self._current().by_id.get(employee_id)
+
+    def by_email(self, email):
+        return self._current().by_email.get(email)
+
+    def name(self, employee_id):
+        employee = self.get(employee_id)
+        return employee.name if employee else f"(deleted #{employee_id})"
+
+    def page(self, after=None, before=None, limit=None):
+        # Keyset page in id order, like queries.EMPLOYEE_PAGES.
+        snapshot = self._current()
+        ids = snapshot.ids
+        if before is not None:
+            end = bisect_left(ids, before[0])
+            start = max(0, end - limit) if limit is not None else 0
+        else:
+            start = bisect_right(ids, after[0]) if after is not None else 0
+            end = start + limit if limit is not None else len(ids)
+        return [snapshot.by_id[employee_id] for employee_id in ids[start:end]]
+
+
+directory = EmployeeDirectory()
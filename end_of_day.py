@@ -0,0 +1,84 @@
+import argparse
+import time
+from datetime import date, timedelta
+
+import db
+from db import get_connection, transaction
+import queries
+import date_ranges
+import date_codec
+import database_setup
+import work_calendar
+
+# ---------- End-of-Day Close ----------
+# Writes an 'Absent' or 'On Leave' row for every employee who has no row
+# for a closed working day, so attendance holds every day explicitly.
+# One INSERT ... SELECT per day; the unique (employee_id, date) index
+# makes rerunning a day a no-op, so catching up after downtime or
+# backfilling a year is just closing those days again. A check-in that
+# arrives after its day was closed still replaces the Absent row.
+#
+# Meant for cron, without the GUI, e.g. shortly after midnight:
+#   5 0 * * *  cd /opt/attendance && python end_of_day.py --days 7
+
+CLOSED_TIME = "00:00:00"        # time stored on rows written by the close
+
+
+def close_days(start, end):
+    # Closes every working day in [start, end) (ISO dates) in one
+    # transaction. Returns (working days closed, rows written).
+    if end > (date.today() + timedelta(days=1)).isoformat():
+        raise ValueError("Days after today cannot be closed")
+    for year in db.archive_years():
+        year_start, year_end = date_ranges.year_range(year)
+        if start < year_end and year_start < end:
+            raise ValueError(f"{year} is archived and can no longer be closed")
+    work_calendar.ensure_calendar()
+    codec = date_codec.codec()
+    days = [day for (day,) in get_connection().execute(queries.WORKING_DAYS, (start, end))]
+    if not days:
+        return 0, 0
+    params = [{"day": codec.date(day), "day_iso": day, "time": codec.time(CLOSED_TIME)}
+              for day in days]
+    with transaction() as conn:
+        # rowcount, unlike total_changes, leaves out trigger writes
+        written = conn.executemany(queries.CLOSE_DAY, params).rowcount
+    return len(days), written
+
+
+def close_day(day):
+    # day is an ISO date; see close_days().
+    return close_days(*date_ranges.between(day, day))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Record Absent / On Leave rows for employees without a check-in.")
+    parser.add_argument("--date", help="close this day, YYYY-MM-DD (default: yesterday)")
+    parser.add_argument("--days", type=int, default=1,
+                        help="close this many days ending yesterday (catch-up after downtime)")
+    parser.add_argument("--from", dest="start", help="backfill from this day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="backfill to this day, YYYY-MM-DD")
+    parser.add_argument("--today", action="store_true",
+                        help="close today as well; later check-ins still count")
+    parser.add_argument("--db", help="database file (default: the app's)")
+    args = parser.parse_args()
+
+    if args.end and not args.start:
+        parser.error("--to needs --from")
+    if args.db:
+        db.set_database_path(args.db)
+    database_setup.ensure_schema()
+    yesterday = date.today() - timedelta(days=1)
+    if args.start:
+        start, end = date_ranges.between(args.start, args.end or yesterday.isoformat())
+    elif args.date:
+        start, end = date_ranges.between(args.date, args.date)
+    else:
+        last = date.today() if args.today else yesterday
+        start, end = date_ranges.between((last - timedelta(days=args.days - 1)).isoformat(),
+                                         last.isoformat())
+    started = time.perf_counter()
+    days, written = close_days(start, end)
+    print(f"Closed {days} working days in [{start}, {end}): {written} rows written "
+          f"in {time.perf_counter() - started:.1f}s")
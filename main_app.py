@@ -1,13 +1,27 @@
+import time
+STARTED = time.perf_counter()
+
+import sys
 import tkinter as tk
 from tkinter import messagebox, filedialog
 from tkinter import ttk
 import sqlite3
-import os
-import shutil
 from datetime import datetime
-from PIL import Image, ImageTk # type: ignore
-import pandas as pd # type: ignore
-import ttkthemes # type: ignore
+import services
+import database_setup
+import date_ranges
+import date_codec
+from virtual_tree import VirtualTreeview
+from background import QueryExecutor, BusyIndicator
+from change_watch import ChangeWatcher
+import report_export
+# attendance_import pulls in pandas, so it is imported by the import
+# action rather than here; the login screens never need it.
+
+ROLES = ["Manager", "Developer", "HR", "Designer", "Other"]
+SEARCH_DELAY_MS = 250       # typing pause before the employee search runs
+HEATMAP_HEIGHT = 220        # pixels; more employees than this are averaged
+HEATMAP_MARGIN = 80         # room left of the heatmap for role names
 
 # ---------- Global Style Configuration ----------
 def configure_styles():
@@ -74,10 +88,6 @@ def create_custom_buttons(style):
                    background="#4CAF50",
                    padding=10)
 
-# ---------- Database Connection ----------
-def connect_db():
-    return sqlite3.connect("attendance_system.db")
-
 # ---------- Main Dashboard ----------
 def main_dashboard():
     for widget in root.winfo_children():
@@ -194,19 +204,13 @@ def admin_login_screen():
                                  parent=login_win)
             return
         
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM admins WHERE username=? AND password=?",
-                      (username, password))
-        
-        if cursor.fetchone():
+        if services.authenticate_admin(username, password):
             login_win.destroy()
             open_admin_dashboard()
         else:
             messagebox.showerror("Login Failed",
                                "Invalid username or password",
                                parent=login_win)
-        conn.close()
     
     # Login button
     login_button = ttk.Button(form_frame,
@@ -273,11 +277,7 @@ def employee_login_screen():
                                  parent=login_win)
             return
         
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name FROM employees WHERE email=?", (email,))
-        employee = cursor.fetchone()
-        conn.close()
+        employee = services.find_employee_by_email(email)
         
         if employee:
             login_win.destroy()
@@ -341,6 +341,9 @@ def open_admin_dashboard():
                            command=admin_window.destroy)
     logout_btn.pack(side="right")
     
+    # Shown while database work is running in the background
+    BusyIndicator(header_frame, executor).pack(side="right", padx=10)
+    
     # Create notebook for different sections
     notebook = ttk.Notebook(main_container)
     notebook.pack(expand=True, fill="both")
@@ -362,14 +365,90 @@ def open_admin_dashboard():
                style="Danger.TButton",
                command=delete_employee).pack(side="left", padx=5)
     
+    def import_attendance_file():
+        path = filedialog.askopenfilename(parent=admin_window,
+                                          title="Import Attendance",
+                                          filetypes=[("Attendance exports", "*.csv *.xlsx"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+        
+        def imported(report):
+            messagebox.showinfo("Import Complete", report.summary(), parent=admin_window)
+        
+        def failed(e):
+            messagebox.showerror("Import Failed",
+                               f"An error occurred: {str(e)}",
+                               parent=admin_window)
+        
+        def run_import():
+            import attendance_import
+            return attendance_import.import_attendance(path)
+        
+        executor.submit(run_import, imported, failed, owner=admin_window)
+    
+    ttk.Button(emp_actions_frame,
+               text="Import Attendance",
+               style="Primary.TButton",
+               command=import_attendance_file).pack(side="left", padx=5)
+    
+    ttk.Button(emp_actions_frame,
+               text="Export Report",
+               style="Primary.TButton",
+               command=lambda: open_export_dialog(admin_window)).pack(side="left", padx=5)
+    
+    # Search box: filters the list as the user types, through the
+    # full-text index, so only matching employees are fetched
+    search_frame = ttk.Frame(emp_frame)
+    search_frame.pack(fill="x", padx=10)
+    
+    ttk.Label(search_frame, text="Search:").pack(side="left", padx=(5, 5))
+    search_var = tk.StringVar()
+    ttk.Entry(search_frame, textvariable=search_var, width=40).pack(side="left", padx=5)
+    ttk.Label(search_frame, text="(name, email, phone or role)").pack(side="left", padx=5)
+    
+    # Text being searched; read by the worker thread, so no Tk calls there
+    employee_search = [""]
+    search_after_id = [None]
+    
+    def fetch_employee_page(after, before, limit):
+        text = employee_search[0]
+        if text:
+            return services.search_employees(text, after=after, before=before, limit=limit)
+        return services.employee_page(after=after, before=before, limit=limit)
+    
+    def apply_search():
+        search_after_id[0] = None
+        if not emp_list.winfo_exists():
+            return
+        text = search_var.get().strip()
+        if text == employee_search[0]:
+            return
+        employee_search[0] = text
+        emp_list.changes = (services.employee_search_changes(text) if text
+                            else services.employee_changes())
+        emp_list.reload()
+    
+    def on_search_typed(*args):
+        # Debounce: search once typing pauses
+        if search_after_id[0] is not None:
+            admin_window.after_cancel(search_after_id[0])
+        search_after_id[0] = admin_window.after(SEARCH_DELAY_MS, apply_search)
+    
+    search_var.trace_add("write", on_search_typed)
+    
     # Employee list
     emp_list_frame = ttk.Frame(emp_frame)
     emp_list_frame.pack(expand=True, fill="both", padx=10, pady=10)
     
-    # Create Treeview for employee list
-    emp_tree = ttk.Treeview(emp_list_frame,
-                           columns=("ID", "Name", "Email", "Phone", "Gender", "Role"),
-                           show='headings')
+    # Create Treeview for employee list (paged in as the user scrolls)
+    emp_list = VirtualTreeview(emp_list_frame,
+                               columns=("ID", "Name", "Email", "Phone", "Gender", "Role"),
+                               fetch_page=fetch_employee_page,
+                               row_key=services.employee_row_key,
+                               executor=executor,
+                               changes=services.employee_changes())
+    emp_tree = emp_list.tree
     
     # Configure columns
     emp_tree.heading("ID", text="ID")
@@ -387,41 +466,38 @@ def open_admin_dashboard():
     emp_tree.column("Gender", width=80)
     emp_tree.column("Role", width=150)
     
-    # Add scrollbar
-    emp_scrollbar = ttk.Scrollbar(emp_list_frame, orient="vertical", command=emp_tree.yview)
-    emp_tree.configure(yscrollcommand=emp_scrollbar.set)
-    
-    emp_scrollbar.pack(side="right", fill="y")
-    emp_tree.pack(expand=True, fill="both")
+    emp_list.pack(expand=True, fill="both")
     
     # Load employee data
     def load_employee_data():
-        for item in emp_tree.get_children():
-            emp_tree.delete(item)
-        
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, name, email, phone, Gender, Role FROM employees")
-        for row in cursor.fetchall():
-            emp_tree.insert("", tk.END, values=row)
-        conn.close()
+        emp_list.reload()
     
     load_employee_data()
     
-    # Refresh button
+    # Pick up employees added or removed elsewhere
+    watcher.watch(["employees"], emp_list.refresh, owner=emp_list)
+    
+    # Refresh button (updates only the rows that changed)
     ttk.Button(emp_actions_frame,
                text="Refresh",
                style="Success.TButton",
-               command=load_employee_data).pack(side="right", padx=5)
+               command=emp_list.refresh).pack(side="right", padx=5)
     
     # Leave Management Tab
     leave_frame = ttk.Frame(notebook)
     notebook.add(leave_frame, text="Leave Management")
     
-    # Leave requests table
-    leave_tree = ttk.Treeview(leave_frame,
-                             columns=("ID", "Employee", "Date", "Reason", "Status"),
-                             show='headings')
+    # Leave requests table (paged in as the user scrolls)
+    leave_list = VirtualTreeview(leave_frame,
+                                 columns=("ID", "Employee", "Date", "Reason", "Status"),
+                                 fetch_page=services.pending_leave_page,
+                                 row_key=services.pending_leave_row_key,
+                                 format_row=lambda row: (row[0], services.employee_name(row[1]),
+                                                         *row[2:]),
+                                 executor=executor,
+                                 changes=services.pending_leave_changes(),
+                                 selectmode="extended")
+    leave_tree = leave_list.tree
     
     # Configure columns
     leave_tree.heading("ID", text="ID")
@@ -437,52 +513,36 @@ def open_admin_dashboard():
     leave_tree.column("Reason", width=250)
     leave_tree.column("Status", width=100)
     
-    # Add scrollbar
-    leave_scrollbar = ttk.Scrollbar(leave_frame, orient="vertical", command=leave_tree.yview)
-    leave_tree.configure(yscrollcommand=leave_scrollbar.set)
-    
-    leave_scrollbar.pack(side="right", fill="y")
-    leave_tree.pack(expand=True, fill="both", padx=10, pady=10)
+    leave_list.pack(expand=True, fill="both", padx=10, pady=10)
     
     # Leave action buttons
     leave_actions_frame = ttk.Frame(leave_frame)
     leave_actions_frame.pack(fill="x", padx=10, pady=10)
     
     def load_leave_requests():
-        for item in leave_tree.get_children():
-            leave_tree.delete(item)
-        
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT l.id, e.name, l.date, l.reason, l.status
-            FROM leaves l
-            JOIN employees e ON l.employee_id = e.id
-            WHERE l.status = 'Pending'
-        """)
-        for row in cursor.fetchall():
-            leave_tree.insert("", tk.END, values=row)
-        conn.close()
+        leave_list.reload()
     
     def update_leave_status(status):
-        selected_item = leave_tree.selection()
-        if not selected_item:
+        # Every selected request (Ctrl/Shift-click) in one transaction
+        selected_items = leave_tree.selection()
+        if not selected_items:
             messagebox.showwarning("Selection Required",
                                  "Please select a leave request to update",
                                  parent=admin_window)
             return
         
-        leave_id = leave_tree.item(selected_item[0])['values'][0]
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE leaves SET status = ? WHERE id = ?", (status, leave_id))
-        conn.commit()
-        conn.close()
+        leave_ids = [leave_tree.item(item)['values'][0] for item in selected_items]
         
-        load_leave_requests()
-        messagebox.showinfo("Success",
-                          f"Leave request {status.lower()} successfully",
-                          parent=admin_window)
+        def saved(updated):
+            # The decided requests drop out of the pending list; nothing
+            # else is redrawn
+            leave_list.refresh()
+            messagebox.showinfo("Success",
+                              f"{updated} leave request(s) {status.lower()} successfully",
+                              parent=admin_window)
+        
+        executor.submit(lambda: services.set_leave_statuses(leave_ids, status), saved,
+                        owner=admin_window)
     
     ttk.Button(leave_actions_frame,
                text="Approve Selected",
@@ -497,10 +557,271 @@ def open_admin_dashboard():
     ttk.Button(leave_actions_frame,
                text="Refresh",
                style="Primary.TButton",
-               command=load_leave_requests).pack(side="right", padx=5)
+               command=leave_list.refresh).pack(side="right", padx=5)
+    
+    # Rule-based bulk actions: every pending request in a date range
+    # and/or of one role, decided by a single UPDATE
+    bulk_frame = ttk.LabelFrame(leave_frame, text="Bulk Action")
+    bulk_frame.pack(fill="x", padx=10, pady=(0, 10))
+    
+    ttk.Label(bulk_frame, text="From:").pack(side="left", padx=(10, 5), pady=10)
+    bulk_start_entry = ttk.Entry(bulk_frame, width=12)
+    bulk_start_entry.pack(side="left", padx=5)
+    
+    ttk.Label(bulk_frame, text="To:").pack(side="left", padx=(10, 5))
+    bulk_end_entry = ttk.Entry(bulk_frame, width=12)
+    bulk_end_entry.pack(side="left", padx=5)
+    
+    ttk.Label(bulk_frame, text="Role:").pack(side="left", padx=(10, 5))
+    bulk_role = ttk.Combobox(bulk_frame, values=["All"] + ROLES, state="readonly", width=12)
+    bulk_role.set("All")
+    bulk_role.pack(side="left", padx=5)
+    
+    def update_matching_leaves(status):
+        start = bulk_start_entry.get().strip()
+        end = bulk_end_entry.get().strip()
+        role = None if bulk_role.get() == "All" else bulk_role.get()
+        try:
+            date_ranges.between(start, end)
+        except ValueError:
+            messagebox.showerror("Invalid Date",
+                               "Please enter dates in YYYY-MM-DD format, with From before To",
+                               parent=admin_window)
+            return
+        
+        def confirm(count):
+            if count == 0:
+                messagebox.showinfo("Nothing to Do",
+                                  "No pending requests match these filters",
+                                  parent=admin_window)
+                return
+            if not messagebox.askyesno("Confirm Bulk Action",
+                                       f"Mark {count} pending request(s) as {status.lower()}?",
+                                       parent=admin_window):
+                return
+            executor.submit(lambda: services.set_pending_leaves_matching(status, start, end, role),
+                            saved, owner=admin_window)
+        
+        def saved(updated):
+            leave_list.refresh()
+            messagebox.showinfo("Success",
+                              f"{updated} leave request(s) {status.lower()} successfully",
+                              parent=admin_window)
+        
+        executor.submit(lambda: services.count_pending_leaves_matching(start, end, role),
+                        confirm, owner=admin_window)
     
-    # Load initial leave data
+    ttk.Button(bulk_frame,
+               text="Approve Matching",
+               style="Success.TButton",
+               command=lambda: update_matching_leaves('Approved')).pack(side="left", padx=5)
+    
+    ttk.Button(bulk_frame,
+               text="Reject Matching",
+               style="Danger.TButton",
+               command=lambda: update_matching_leaves('Rejected')).pack(side="left", padx=5)
+    
+    # Load initial leave data; new requests appear within one poll
     load_leave_requests()
+    watcher.watch(["leaves"], leave_list.refresh, owner=leave_list)
+    
+    # Monthly Summary Tab (company-wide, from the monthly summary table)
+    summary_frame = ttk.Frame(notebook)
+    notebook.add(summary_frame, text="Monthly Summary")
+    
+    summary_filter = ttk.Frame(summary_frame)
+    summary_filter.pack(fill="x", padx=10, pady=10)
+    
+    today = datetime.now()
+    month_names = ["January", "February", "March", "April", "May", "June",
+                   "July", "August", "September", "October", "November", "December"]
+    ttk.Label(summary_filter, text="Month:").pack(side="left", padx=(0, 5))
+    summary_month = ttk.Combobox(summary_filter, values=month_names, state="readonly", width=15)
+    summary_month.set(month_names[today.month - 1])
+    summary_month.pack(side="left", padx=5)
+    
+    ttk.Label(summary_filter, text="Year:").pack(side="left", padx=(20, 5))
+    summary_year = ttk.Combobox(summary_filter,
+                                values=[str(year) for year in range(today.year, today.year - 5, -1)],
+                                state="readonly", width=10)
+    summary_year.set(str(today.year))
+    summary_year.pack(side="left", padx=5)
+    
+    # (year, month) being shown; read by the worker thread, so no Tk calls there
+    summary_params = [(today.year, today.month)]
+    
+    def fetch_summary_page(after, before, limit):
+        return services.monthly_summary_page(*summary_params[0],
+                                             after=after, before=before, limit=limit)
+    
+    summary_list = VirtualTreeview(summary_frame,
+                                   columns=("ID", "Employee", "Role", "Present", "Absent",
+                                            "On Leave", "Total"),
+                                   fetch_page=fetch_summary_page,
+                                   row_key=services.monthly_summary_row_key,
+                                   executor=executor)
+    for column, width in (("ID", 50), ("Employee", 150), ("Role", 100), ("Present", 70),
+                          ("Absent", 70), ("On Leave", 70), ("Total", 70)):
+        summary_list.tree.heading(column, text=column)
+        summary_list.tree.column(column, width=width)
+    summary_list.pack(expand=True, fill="both", padx=10, pady=10)
+    
+    def load_monthly_summary():
+        summary_params[0] = (int(summary_year.get()), month_names.index(summary_month.get()) + 1)
+        summary_list.reload()
+    
+    summary_month.bind('<<ComboboxSelected>>', lambda e: load_monthly_summary())
+    summary_year.bind('<<ComboboxSelected>>', lambda e: load_monthly_summary())
+    
+    ttk.Button(summary_filter,
+               text="Refresh",
+               style="Success.TButton",
+               command=load_monthly_summary).pack(side="right", padx=5)
+    
+    load_monthly_summary()
+    watcher.watch(["attendance", "employees"], load_monthly_summary, owner=summary_list)
+    
+    # Analytics Tab: every employee's attendance for a month or a year as a
+    # heatmap, with totals per role and per day (see attendance_heatmap.py)
+    analytics_frame = ttk.Frame(notebook)
+    notebook.add(analytics_frame, text="Analytics")
+    
+    analytics_filter = ttk.Frame(analytics_frame)
+    analytics_filter.pack(fill="x", padx=10, pady=10)
+    
+    ttk.Label(analytics_filter, text="Month:").pack(side="left", padx=(0, 5))
+    analytics_month = ttk.Combobox(analytics_filter, values=["All"] + month_names,
+                                   state="readonly", width=15)
+    analytics_month.set(month_names[today.month - 1])
+    analytics_month.pack(side="left", padx=5)
+    
+    ttk.Label(analytics_filter, text="Year:").pack(side="left", padx=(20, 5))
+    analytics_year = ttk.Combobox(analytics_filter,
+                                  values=[str(year) for year in range(today.year, today.year - 5, -1)],
+                                  state="readonly", width=10)
+    analytics_year.set(str(today.year))
+    analytics_year.pack(side="left", padx=5)
+    
+    # Legend, in the heatmap's colours
+    for text, colour in (("Present", "#4CAF50"), ("On Leave", "#2196F3"),
+                         ("Absent", "#F44336"), ("No record", "#E0E0E0")):
+        tk.Label(analytics_filter, text=text, bg=colour, padx=4).pack(side="left", padx=(10, 0))
+    
+    heatmap_canvas = tk.Canvas(analytics_frame, height=HEATMAP_HEIGHT, bg="white",
+                               highlightthickness=0)
+    heatmap_canvas.pack(fill="x", padx=10)
+    heatmap_hover = ttk.Label(analytics_frame, text="")
+    heatmap_hover.pack(fill="x", padx=10)
+    
+    totals_frame = ttk.Frame(analytics_frame)
+    totals_frame.pack(expand=True, fill="both", padx=10, pady=(5, 10))
+    
+    role_totals = ttk.Treeview(totals_frame, show="headings", height=6,
+                               columns=("Role", "Employees", "Present", "On Leave", "Absent",
+                                        "Rate"))
+    for column, width in (("Role", 90), ("Employees", 70), ("Present", 60),
+                          ("On Leave", 60), ("Absent", 60), ("Rate", 50)):
+        role_totals.heading(column, text=column)
+        role_totals.column(column, width=width)
+    role_totals.pack(side="left", fill="y")
+    
+    day_totals = ttk.Treeview(totals_frame, show="headings", height=6,
+                              columns=("Date", "Day", "Present", "On Leave", "Absent", "Rate"))
+    for column, width in (("Date", 85), ("Day", 80), ("Present", 55), ("On Leave", 60),
+                          ("Absent", 55), ("Rate", 50)):
+        day_totals.heading(column, text=column)
+        day_totals.column(column, width=width)
+    day_scroll = ttk.Scrollbar(totals_frame, orient="vertical", command=day_totals.yview)
+    day_totals.configure(yscrollcommand=day_scroll.set)
+    day_scroll.pack(side="right", fill="y")
+    day_totals.pack(side="right", expand=True, fill="both", padx=(10, 0))
+    
+    # Loaded heatmap, its rendered image and the PhotoImage Tk is showing
+    heatmap_view = {"heatmap": None, "image": None, "photo": None}
+    
+    def heatmap_size():
+        return (max(heatmap_canvas.winfo_width() - HEATMAP_MARGIN, 1), HEATMAP_HEIGHT)
+    
+    def draw_heatmap(image):
+        # image is None when there is no one to draw
+        heatmap_view["image"] = image
+        heatmap_canvas.delete("all")
+        if image is None:
+            heatmap_view["photo"] = None
+            heatmap_canvas.create_text(HEATMAP_MARGIN, HEATMAP_HEIGHT // 2,
+                                       text="No employees to show", anchor="w")
+            return
+        heatmap_view["photo"] = tk.PhotoImage(data=image.ppm, format="PPM")
+        heatmap_canvas.create_image(HEATMAP_MARGIN, 0, image=heatmap_view["photo"], anchor="nw")
+        for role, y in image.role_rows:
+            heatmap_canvas.create_line(0, y, HEATMAP_MARGIN + image.width, y, fill="white")
+            heatmap_canvas.create_text(4, y + 2, text=role, anchor="nw")
+    
+    def show_analytics(result):
+        heatmap, image, by_role, by_day, size = result
+        heatmap_view["heatmap"] = heatmap
+        draw_heatmap(image)
+        if size != heatmap_size():
+            # Loaded before the canvas had its final size
+            rerender_heatmap()
+        role_totals.delete(*role_totals.get_children())
+        for role, employees, present, on_leave, absent, _, rate in by_role:
+            role_totals.insert("", "end", values=(role, employees, present, on_leave, absent,
+                                                  f"{rate}%"))
+        day_totals.delete(*day_totals.get_children())
+        for day, _, present, on_leave, absent, _, rate in by_day:
+            day_totals.insert("", "end", values=(*date_codec.display_date(day),
+                                                 present, on_leave, absent, f"{rate}%"))
+    
+    def load_analytics():
+        year = int(analytics_year.get())
+        month = analytics_month.get()
+        month = None if month == "All" else month_names.index(month) + 1
+        size = heatmap_size()
+        
+        def load():
+            # numpy is only imported once the tab is used
+            import attendance_heatmap
+            heatmap = attendance_heatmap.load_month(year, month)
+            image = heatmap.render(*size) if len(heatmap.employee_ids) else None
+            return (heatmap, image, heatmap.role_totals(),
+                    heatmap.day_totals(), size)
+        
+        executor.submit(load, show_analytics, key=("analytics", str(admin_window)),
+                        owner=heatmap_canvas)
+    
+    def rerender_heatmap(event=None):
+        # Resized: redraw the loaded heatmap at the new size, without a query
+        heatmap = heatmap_view["heatmap"]
+        if heatmap is not None and len(heatmap.employee_ids):
+            size = heatmap_size()
+            executor.submit(lambda: heatmap.render(*size), draw_heatmap,
+                            key=("analytics-render", str(admin_window)), owner=heatmap_canvas)
+    
+    def hover_heatmap(event):
+        heatmap, image = heatmap_view["heatmap"], heatmap_view["image"]
+        if image is not None:
+            heatmap_hover.config(text=heatmap.describe(image, event.x - HEATMAP_MARGIN, event.y))
+    
+    heatmap_canvas.bind("<Configure>", rerender_heatmap)
+    heatmap_canvas.bind("<Motion>", hover_heatmap)
+    heatmap_canvas.bind("<Leave>", lambda e: heatmap_hover.config(text=""))
+    analytics_month.bind('<<ComboboxSelected>>', lambda e: load_analytics())
+    analytics_year.bind('<<ComboboxSelected>>', lambda e: load_analytics())
+    
+    ttk.Button(analytics_filter,
+               text="Refresh",
+               style="Success.TButton",
+               command=load_analytics).pack(side="right", padx=5)
+    
+    # A year of every employee is too much to reload on each check-in, so
+    # the tab loads when first opened and on Refresh
+    def on_tab_changed(event):
+        if (notebook.select() == str(analytics_frame)
+                and heatmap_view["heatmap"] is None):
+            load_analytics()
+    
+    notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
 
 # ---------- Add Employee Form ----------
 def open_add_employee_form():
@@ -566,7 +887,7 @@ def open_add_employee_form():
             entry.set("Select Gender")
         elif field_name == "role":
             entry = ttk.Combobox(field_frame,
-                               values=["Manager", "Developer", "HR", "Designer", "Other"],
+                               values=ROLES,
                                state="readonly")
             entry.set("Select Role")
         else:
@@ -575,16 +896,6 @@ def open_add_employee_form():
         entry.pack(fill="x", pady=(5, 0))
         entries[field_name] = entry
     
-    def validate_email(email):
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
-    
-    def validate_phone(phone):
-        import re
-        pattern = r'^\+?1?\d{9,15}$'
-        return re.match(pattern, phone) is not None
-    
     def save_employee():
         # Get values
         name = entries['name'].get().strip()
@@ -600,13 +911,13 @@ def open_add_employee_form():
                                  parent=add_employee_window)
             return
         
-        if not validate_email(email):
+        if not services.is_valid_email(email):
             messagebox.showwarning("Invalid Email",
                                  "Please enter a valid email address",
                                  parent=add_employee_window)
             return
         
-        if not validate_phone(phone):
+        if not services.is_valid_phone(phone):
             messagebox.showwarning("Invalid Phone",
                                  "Please enter a valid phone number",
                                  parent=add_employee_window)
@@ -626,32 +937,17 @@ def open_add_employee_form():
         
         # Save to database
         try:
-            conn = connect_db()
-            cursor = conn.cursor()
-            
-            # Check for duplicate email
-            cursor.execute("SELECT * FROM employees WHERE email = ?", (email,))
-            if cursor.fetchone():
-                messagebox.showerror("Duplicate Email",
-                                   "An employee with this email already exists",
-                                   parent=add_employee_window)
-                conn.close()
-                return
-            
-            # Insert new employee
-            cursor.execute("""
-                INSERT INTO employees (name, email, phone, Gender, Role)
-                VALUES (?, ?, ?, ?, ?)
-            """, (name, email, phone, gender, role))
-            
-            conn.commit()
-            conn.close()
+            services.add_employee(name, email, phone, gender, role)
             
             messagebox.showinfo("Success",
                               "Employee added successfully!",
                               parent=add_employee_window)
             add_employee_window.destroy()
             
+        except services.DuplicateEmailError as e:
+            messagebox.showerror("Duplicate Email",
+                               str(e),
+                               parent=add_employee_window)
         except sqlite3.Error as e:
             messagebox.showerror("Database Error",
                                f"An error occurred: {str(e)}",
@@ -675,27 +971,119 @@ def open_add_employee_form():
                               command=add_employee_window.destroy)
     cancel_button.pack(side="right", padx=5)
 
+# ---------- Export Report ----------
+def open_export_dialog(parent_window):
+    export_window = tk.Toplevel(parent_window)
+    export_window.title("Export Report")
+    export_window.geometry("400x420")
+    export_window.configure(bg="#F5F5F5")
+    export_window.transient(parent_window)
+    export_window.grab_set()
+    
+    form_frame = ttk.Frame(export_window)
+    form_frame.pack(expand=True, fill="both", padx=30, pady=20)
+    
+    ttk.Label(form_frame, text="Report").pack(anchor="w")
+    report_combo = ttk.Combobox(form_frame, values=["Attendance", "Leaves"], state="readonly")
+    report_combo.set("Attendance")
+    report_combo.pack(fill="x", pady=(5, 10))
+    
+    ttk.Label(form_frame, text="From (YYYY-MM-DD, optional)").pack(anchor="w")
+    start_entry = ttk.Entry(form_frame)
+    start_entry.pack(fill="x", pady=(5, 10))
+    
+    ttk.Label(form_frame, text="To (YYYY-MM-DD, optional)").pack(anchor="w")
+    end_entry = ttk.Entry(form_frame)
+    end_entry.pack(fill="x", pady=(5, 10))
+    
+    ttk.Label(form_frame, text="Role").pack(anchor="w")
+    role_combo = ttk.Combobox(form_frame, values=["All"] + ROLES, state="readonly")
+    role_combo.set("All")
+    role_combo.pack(fill="x", pady=(5, 10))
+    
+    ttk.Label(form_frame, text="Employee ID (optional)").pack(anchor="w")
+    emp_id_entry = ttk.Entry(form_frame)
+    emp_id_entry.pack(fill="x", pady=(5, 10))
+    
+    def run_export():
+        start = start_entry.get().strip()
+        end = end_entry.get().strip()
+        emp_id = emp_id_entry.get().strip()
+        role = role_combo.get()
+        
+        if emp_id and not emp_id.isdigit():
+            messagebox.showerror("Invalid Input", "Enter a valid Employee ID", parent=export_window)
+            return
+        try:
+            date_ranges.between(start, end)
+        except ValueError:
+            messagebox.showerror("Invalid Date",
+                               "Please enter dates in YYYY-MM-DD format, with From before To",
+                               parent=export_window)
+            return
+        
+        path = filedialog.asksaveasfilename(parent=export_window,
+                                            title="Save Report",
+                                            defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"),
+                                                       ("Excel", "*.xlsx"),
+                                                       ("Parquet", "*.parquet")])
+        if not path:
+            return
+        
+        report = report_combo.get().lower()
+        
+        def exported(result):
+            rows, seconds = result
+            messagebox.showinfo("Export Complete",
+                              f"Exported {rows} rows in {seconds:.1f}s",
+                              parent=parent_window)
+        
+        def failed(e):
+            messagebox.showerror("Export Failed",
+                               f"An error occurred: {str(e)}",
+                               parent=parent_window)
+        
+        executor.submit(lambda: report_export.export_report(report, path, start, end,
+                                                            None if role == "All" else role,
+                                                            emp_id or None),
+                        exported, failed, owner=parent_window)
+        export_window.destroy()
+    
+    button_frame = ttk.Frame(form_frame)
+    button_frame.pack(fill="x", pady=10)
+    
+    ttk.Button(button_frame,
+               text="Export",
+               style="Primary.TButton",
+               command=run_export).pack(side="left", padx=5)
+    
+    ttk.Button(button_frame,
+               text="Cancel",
+               style="Danger.TButton",
+               command=export_window.destroy).pack(side="right", padx=5)
+
 # ---------- View Employee List ----------
 def view_employee_list():
     view_window = tk.Toplevel(root)
     view_window.title("Employee List")
     view_window.geometry("600x300")
 
-    tree = ttk.Treeview(view_window, columns=("ID", "Name", "Email", "Phone", "Gender", "Role"), show='headings')
+    employee_list = VirtualTreeview(view_window,
+                                    columns=("ID", "Name", "Email", "Phone", "Gender", "Role"),
+                                    fetch_page=services.employee_page,
+                                    row_key=services.employee_row_key,
+                                    executor=executor)
+    tree = employee_list.tree
     tree.heading("ID", text="ID")
     tree.heading("Name", text="Name")
     tree.heading("Email", text="Email")
     tree.heading("Phone", text="Phone")
     tree.heading("Gender", text="Gender")
     tree.heading("Role", text="Role")
-    tree.pack(fill=tk.BOTH, expand=True)
+    employee_list.pack(fill=tk.BOTH, expand=True)
 
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, email, phone, Gender, Role FROM employees")
-    for row in cursor.fetchall():
-        tree.insert("", tk.END, values=row)
-    conn.close()
+    employee_list.reload()
 
 # ---------- Delete Employee ----------
 def delete_employee():
@@ -713,16 +1101,12 @@ def delete_employee():
             messagebox.showerror("Invalid Input", "Enter a valid Employee ID")
             return
 
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM employees WHERE id = ?", (emp_id,))
-        if cursor.fetchone() is None:
+        try:
+            services.delete_employee(int(emp_id))
+        except services.EmployeeNotFoundError:
             messagebox.showerror("Error", "Employee ID not found")
         else:
-            cursor.execute("DELETE FROM employees WHERE id = ?", (emp_id,))
-            conn.commit()
             messagebox.showinfo("Deleted", f"Employee ID {emp_id} deleted successfully")
-        conn.close()
         del_window.destroy()
 
     tk.Button(del_window, text="Delete", command=delete_from_db).pack(pady=10)
@@ -754,10 +1138,7 @@ def manage_leaves():
             messagebox.showwarning("Input Error", "All fields must be filled!")
             return
         try:
-            leave_date_obj = datetime.strptime(leave_date, "%Y-%m-%d").date()
-            today = datetime.now().date()
-            
-            if leave_date_obj < today:
+            if not services.is_upcoming(leave_date):
                 messagebox.showerror("Invalid Date", "You can only apply for upcoming dates.")
                 return
         except ValueError:
@@ -765,54 +1146,12 @@ def manage_leaves():
             return
         
         
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO leaves (employee_id, date, reason, status) VALUES (?, ?, ?, 'Pending')",
-                       (emp_id, leave_date, reason))
-        conn.commit()
-        conn.close()
+        services.submit_leave(emp_id, leave_date, reason)
 
         messagebox.showinfo("Success", "Leave applied successfully!")
 
     ttk.Button(leave_window, text="Apply Leave", command=apply_leave).pack(pady=10)
 
-# ---------- Approve Leaves ----------
-def approve_leaves():
-    approve_window = tk.Toplevel(root)
-    approve_window.title("Approve/Reject Leaves")
-    approve_window.geometry("700x400")
-
-    tree = ttk.Treeview(approve_window, columns=("ID", "Employee ID", "Date", "Reason", "Status"), show='headings')
-    tree.heading("ID", text="ID")
-    tree.heading("Employee ID", text="Employee ID")
-    tree.heading("Date", text="Date")
-    tree.heading("Reason", text="Reason")
-    tree.heading("Status", text="Status")
-    tree.pack(fill=tk.BOTH, expand=True)
-
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, employee_id, date, reason, status FROM leaves WHERE status = 'Pending'")
-    rows = cursor.fetchall()
-    for row in rows:
-        tree.insert("", tk.END, values=row)
-
-    def update_leave_status(status):
-        selected_item = tree.selection()
-        if not selected_item:
-            messagebox.showerror("Selection Error", "No leave selected")
-            return
-
-        leave_id = tree.item(selected_item[0])['values'][0]
-        cursor.execute("UPDATE leaves SET status = ? WHERE id = ?", (status,leave_id))
-        conn.commit()
-        messagebox.showinfo("Success", f"Leave {status.lower()} successfully!")
-        approve_window.destroy()
-        conn.close()
-
-    ttk.Button(approve_window, text="Approve Selected", command=lambda: update_leave_status('Approved')).pack(pady=5)
-    ttk.Button(approve_window, text="Reject Selected", command=lambda: update_leave_status('Rejected')).pack(pady=5)
-
 # ---------- Employee Dashboard ----------
 def open_employee_dashboard(employee_id, employee_name):
     emp_window = tk.Toplevel(root)
@@ -853,6 +1192,9 @@ def open_employee_dashboard(employee_id, employee_name):
                            command=emp_window.destroy)
     logout_btn.pack(side="right")
     
+    # Shown while database work is running in the background
+    BusyIndicator(header_frame, executor).pack(side="right", padx=10)
+    
     # Create notebook for different sections
     notebook = ttk.Notebook(main_container)
     notebook.pack(expand=True, fill="both")
@@ -866,7 +1208,8 @@ def open_employee_dashboard(employee_id, employee_name):
     attendance_actions.pack(fill="x", padx=10, pady=10)
     
     def mark_attendance():
-        mark_attendance_manually(emp_window, employee_id)
+        mark_attendance_manually(emp_window, employee_id,
+                                 on_marked=lambda: refresh_attendance())
     
     # Mark attendance button
     mark_btn = ttk.Button(attendance_actions,
@@ -914,8 +1257,21 @@ def open_employee_dashboard(employee_id, employee_name):
                              width=10)
     year_combo.pack(side="left", padx=5)
 
+    # Custom date range (e.g. a payroll period); overrides Month/Year
+    range_frame = ttk.Frame(attendance_frame)
+    range_frame.pack(fill="x", padx=10, pady=5)
+
+    ttk.Label(range_frame, text="From:").pack(side="left", padx=(0, 5))
+    start_entry = ttk.Entry(range_frame, width=12)
+    start_entry.pack(side="left", padx=5)
+
+    ttk.Label(range_frame, text="To:").pack(side="left", padx=(20, 5))
+    end_entry = ttk.Entry(range_frame, width=12)
+    end_entry.pack(side="left", padx=5)
+    ttk.Label(range_frame, text="(YYYY-MM-DD)").pack(side="left", padx=(5, 0))
+
     # Statistics frame
-    stats_frame = ttk.LabelFrame(attendance_frame, text="Monthly Statistics")
+    stats_frame = ttk.LabelFrame(attendance_frame, text="Attendance Statistics")
     stats_frame.pack(fill="x", padx=10, pady=10)
 
     # Statistics labels
@@ -928,17 +1284,49 @@ def open_employee_dashboard(employee_id, employee_name):
     absent_label = ttk.Label(stats_grid, text="Absent: 0")
     absent_label.grid(row=0, column=1, padx=20, pady=5)
 
-    total_label = ttk.Label(stats_grid, text="Total Days: 0")
-    total_label.grid(row=0, column=2, padx=20, pady=5)
+    leave_label = ttk.Label(stats_grid, text="On Leave: 0")
+    leave_label.grid(row=0, column=2, padx=20, pady=5)
+
+    total_label = ttk.Label(stats_grid, text="Working Days: 0")
+    total_label.grid(row=0, column=3, padx=20, pady=5)
+
+    # Streaks in working days, from the monthly attendance bitmaps
+    streak_label = ttk.Label(stats_grid, text="Current Streak: 0")
+    streak_label.grid(row=1, column=0, padx=20, pady=5)
+
+    longest_streak_label = ttk.Label(stats_grid, text="Longest Streak: 0")
+    longest_streak_label.grid(row=1, column=1, padx=20, pady=5)
+
+    absence_streak_label = ttk.Label(stats_grid, text="Longest Absence: 0")
+    absence_streak_label.grid(row=1, column=2, padx=20, pady=5)
 
     # Attendance table frame
     attendance_table_frame = ttk.Frame(attendance_frame)
     attendance_table_frame.pack(expand=True, fill="both", padx=10, pady=10)
 
-    # Create Treeview for attendance
-    attendance_tree = ttk.Treeview(attendance_table_frame,
-                                 columns=("Date", "Day", "Time", "Status"),
-                                 show='headings')
+    # Create Treeview for attendance (paged in as the user scrolls)
+    history_range = [date_ranges.ALL_DATES]
+
+    def fetch_attendance_page(after, before, limit):
+        start, end = history_range[0]
+        return services.attendance_history_page(employee_id, start, end,
+                                                after=after, before=before, limit=limit)
+
+    def format_attendance_row(row):
+        day, clock, status, _ = row
+        # Date with the day name, cached per stored value
+        return (*date_codec.display_date(day), date_codec.display_time(clock), status)
+
+    attendance_list = VirtualTreeview(attendance_table_frame,
+                                      columns=("Date", "Day", "Time", "Status"),
+                                      fetch_page=fetch_attendance_page,
+                                      row_key=services.attendance_row_key,
+                                      format_row=format_attendance_row,
+                                      executor=executor,
+                                      changes=services.attendance_history_changes(
+                                          employee_id, lambda: history_range[0]),
+                                      descending=True)
+    attendance_tree = attendance_list.tree
 
     # Configure columns
     attendance_tree.heading("Date", text="Date")
@@ -952,89 +1340,98 @@ def open_employee_dashboard(employee_id, employee_name):
     attendance_tree.column("Time", width=100)
     attendance_tree.column("Status", width=100)
 
-    # Add scrollbar
-    attendance_scrollbar = ttk.Scrollbar(attendance_table_frame,
-                                       orient="vertical",
-                                       command=attendance_tree.yview)
-    attendance_tree.configure(yscrollcommand=attendance_scrollbar.set)
+    ttk.Button(attendance_table_frame,
+               text="Load More",
+               style="Primary.TButton",
+               command=attendance_list.load_more).pack(side="bottom", pady=(5, 0))
+    attendance_list.pack(expand=True, fill="both")
 
-    attendance_scrollbar.pack(side="right", fill="y")
-    attendance_tree.pack(expand=True, fill="both")
+    def update_statistics(start, end):
+        # Working days from the calendar; unrecorded ones count as absent
+        # or, under an approved leave, as on leave
+        def count():
+            return (services.attendance_counts(employee_id, start, end),
+                    services.attendance_streaks(employee_id, start, end))
 
-    def update_statistics(records):
-        present_count = sum(1 for r in records if r[3] == 'Present')
-        total_count = len(records)
-        absent_count = total_count - present_count
+        def show(result):
+            (present_count, absent_count, leave_count, working_count), streaks = result
+            current_streak, longest_streak, absence_streak = streaks
 
-        present_label.config(text=f"Present: {present_count}")
-        absent_label.config(text=f"Absent: {absent_count}")
-        total_label.config(text=f"Total Days: {total_count}")
+            present_label.config(text=f"Present: {present_count}")
+            absent_label.config(text=f"Absent: {absent_count}")
+            leave_label.config(text=f"On Leave: {leave_count}")
+            total_label.config(text=f"Working Days: {working_count}")
+            streak_label.config(text=f"Current Streak: {current_streak}")
+            longest_streak_label.config(text=f"Longest Streak: {longest_streak}")
+            absence_streak_label.config(text=f"Longest Absence: {absence_streak}")
 
-    def load_attendance_history():
-        # Clear existing items
-        for item in attendance_tree.get_children():
-            attendance_tree.delete(item)
+        # Quickly flipping Month/Year supersedes the counts still in flight
+        executor.submit(count, show, key=("attendance-stats", str(emp_window)), owner=stats_frame)
+
+    def selected_range():
+        # Custom From/To dates win over the Month/Year comboboxes
+        start_text = start_entry.get().strip()
+        end_text = end_entry.get().strip()
+        if start_text or end_text:
+            return date_ranges.between(start_text, end_text)
 
-        # Get filter values
         selected_month = month_var.get()
         selected_year = year_var.get()
+        if selected_month != "All" and selected_year == "All":
+            # A month on its own means that month this year
+            year_var.set(str(current_year))
+            selected_year = year_var.get()
 
-        # Prepare SQL query based on filters
-        query = """
-            SELECT date, time, status
-            FROM attendance
-            WHERE employee_id = ?
-        """
-        params = [employee_id]
-
-        if selected_year != "All":
-            query += " AND strftime('%Y', date) = ?"
-            params.append(selected_year)
-
-        if selected_month != "All":
-            month_num = str(months.index(selected_month)).zfill(2)
-            query += " AND strftime('%m', date) = ?"
-            params.append(month_num)
-
-        query += " ORDER BY date DESC, time DESC"
-
-        # Load attendance history from database
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        records = cursor.fetchall()
-        
-        # Process and display records
-        display_records = []
-        for date_str, time_str, status in records:
-            # Convert date string to datetime
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            # Get day name
-            day_name = date_obj.strftime("%A")
-            # Format date for display
-            formatted_date = date_obj.strftime("%d-%m-%Y")
-            
-            display_records.append((formatted_date, day_name, time_str, status))
-            attendance_tree.insert("", "end", values=(formatted_date, day_name, time_str, status))
+        return date_ranges.month_year_range(
+            None if selected_year == "All" else int(selected_year),
+            None if selected_month == "All" else months.index(selected_month))
 
-        conn.close()
+    def load_attendance_history():
+        try:
+            start, end = selected_range()
+        except ValueError:
+            messagebox.showerror("Invalid Date",
+                               "Please enter dates in YYYY-MM-DD format, with From before To",
+                               parent=emp_window)
+            return
+
+        # Load the first page of attendance history from database
+        history_range[0] = (start, end)
+        attendance_list.reload()
 
         # Update statistics
-        update_statistics(display_records)
+        update_statistics(start, end)
+
+    def on_month_year_selected(event=None):
+        # Picking a month or year switches back from a custom range
+        start_entry.delete(0, "end")
+        end_entry.delete(0, "end")
+        load_attendance_history()
 
     # Bind filter changes to reload attendance
-    month_combo.bind('<<ComboboxSelected>>', lambda e: load_attendance_history())
-    year_combo.bind('<<ComboboxSelected>>', lambda e: load_attendance_history())
+    month_combo.bind('<<ComboboxSelected>>', on_month_year_selected)
+    year_combo.bind('<<ComboboxSelected>>', on_month_year_selected)
+
+    ttk.Button(range_frame,
+               text="Apply Range",
+               style="Primary.TButton",
+               command=load_attendance_history).pack(side="left", padx=10)
+
+    def refresh_attendance():
+        # Same range; only changed rows are redrawn
+        attendance_list.refresh()
+        update_statistics(*history_range[0])
 
     # Add refresh button for attendance
     refresh_btn = ttk.Button(filter_frame,
                             text="Refresh",
                             style="Success.TButton",
-                            command=load_attendance_history)
+                            command=refresh_attendance)
     refresh_btn.pack(side="right", padx=5)
 
     # Load initial attendance history
     load_attendance_history()
+    watcher.watch(["attendance"], refresh_attendance, owner=attendance_list)
 
     # Leave Management Tab
     leave_frame = ttk.Frame(notebook)
@@ -1074,18 +1471,8 @@ def open_employee_dashboard(employee_id, employee_name):
             return
         
         try:
-            # Validate date format
-            datetime.strptime(leave_date, "%Y-%m-%d")
-            
-            # Save to database
-            conn = connect_db()
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO leaves (employee_id, date, reason, status)
-                VALUES (?, ?, ?, 'Pending')
-            """, (employee_id, leave_date, reason))
-            conn.commit()
-            conn.close()
+            # Validates the date format, then saves to database
+            services.submit_leave(employee_id, leave_date, reason)
             
             messagebox.showinfo("Success",
                               "Leave request submitted successfully!",
@@ -1095,8 +1482,8 @@ def open_employee_dashboard(employee_id, employee_name):
             date_entry.delete(0, "end")
             reason_text.delete("1.0", "end")
             
-            # Refresh leave history
-            load_leave_history()
+            # Show the new request without reloading the history
+            leave_history_list.refresh()
             
         except ValueError:
             messagebox.showerror("Invalid Date",
@@ -1118,9 +1505,18 @@ def open_employee_dashboard(employee_id, employee_name):
     history_frame = ttk.LabelFrame(leave_frame, text="Leave History")
     history_frame.pack(expand=True, fill="both", padx=10, pady=10)
     
-    leave_tree = ttk.Treeview(history_frame,
-                             columns=("Date", "Reason", "Status"),
-                             show='headings')
+    # Paged newest first, like the attendance history
+    leave_history_list = VirtualTreeview(
+        history_frame,
+        columns=("Date", "Reason", "Status"),
+        fetch_page=lambda after, before, limit: services.leave_history_page(
+            employee_id, after=after, before=before, limit=limit),
+        row_key=services.leave_history_row_key,
+        format_row=lambda row: row[:3],
+        executor=executor,
+        changes=services.leave_history_changes(employee_id),
+        descending=True)
+    leave_tree = leave_history_list.tree
     
     # Configure columns
     leave_tree.heading("Date", text="Date")
@@ -1132,84 +1528,73 @@ def open_employee_dashboard(employee_id, employee_name):
     leave_tree.column("Reason", width=300)
     leave_tree.column("Status", width=100)
     
-    # Add scrollbar
-    leave_scrollbar = ttk.Scrollbar(history_frame,
-                                   orient="vertical",
-                                   command=leave_tree.yview)
-    leave_tree.configure(yscrollcommand=leave_scrollbar.set)
-    
-    leave_scrollbar.pack(side="right", fill="y")
-    leave_tree.pack(expand=True, fill="both")
+    ttk.Button(history_frame,
+               text="Load More",
+               style="Primary.TButton",
+               command=leave_history_list.load_more).pack(side="bottom", pady=(5, 0))
+    leave_history_list.pack(expand=True, fill="both")
     
     def load_leave_history():
-        # Clear existing items
-        for item in leave_tree.get_children():
-            leave_tree.delete(item)
-        
-        # Load leave history from database
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT date, reason, status
-            FROM leaves
-            WHERE employee_id = ?
-            ORDER BY date DESC
-        """, (employee_id,))
-        
-        for row in cursor.fetchall():
-            leave_tree.insert("", "end", values=row)
-        
-        conn.close()
+        # First page only; older requests come in as the user scrolls
+        leave_history_list.reload()
     
     # Load initial leave history
     load_leave_history()
+    watcher.watch(["leaves"], leave_history_list.refresh, owner=leave_history_list)
 
-def mark_attendance_manually(parent_window, employee_id):
+def mark_attendance_manually(parent_window, employee_id, on_marked=None):
     # Get current date and time
     current_datetime = datetime.now()
-    current_date = current_datetime.strftime("%Y-%m-%d")
-    current_time = current_datetime.strftime("%H:%M:%S")
     
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        
-        # Check if attendance already marked for today
-        cursor.execute("""
-            SELECT * FROM attendance
-            WHERE employee_id = ? AND date = ?
-        """, (employee_id, current_date))
-        
-        if cursor.fetchone():
+    def mark():
+        # One atomic statement; False means today was already marked
+        return not services.check_in(employee_id, current_datetime)
+    
+    def marked(already_marked):
+        if already_marked:
             messagebox.showinfo("Already Marked",
                               "Attendance already marked for today",
                               parent=parent_window)
         else:
-            # Mark attendance
-            cursor.execute("""
-                INSERT INTO attendance (employee_id, date, time, status)
-                VALUES (?, ?, ?, 'Present')
-            """, (employee_id, current_date, current_time))
-            
-            conn.commit()
+            if on_marked is not None:
+                on_marked()
             messagebox.showinfo("Success",
                               "Attendance marked successfully!",
                               parent=parent_window)
-        
-        conn.close()
-        
-    except sqlite3.Error as e:
+    
+    def failed(e):
         messagebox.showerror("Database Error",
                            f"An error occurred: {str(e)}",
                            parent=parent_window)
+    
+    executor.submit(mark, marked, failed, owner=parent_window)
 
 # ---------- Run Application ----------
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        import startup_profile
+        startup_profile.profile(__file__)
+        sys.exit()
+    
     root = tk.Tk()
     root.title("Office Attendance System")
     root.geometry("800x600")
     root.configure(bg="#F5F5F5")
     
+    # Bring an existing database up to the current schema (indexes etc.);
+    # a file that is already current skips straight to the window
+    if not database_setup.schema_current():
+        database_setup.upgrade_schema()
+    
+    # Worker pool for database work, so the window never blocks on a query
+    executor = QueryExecutor(root)
+    
+    # Polls for writes from other windows and machines; open tabs whose
+    # tables changed refresh themselves
+    watcher = ChangeWatcher(root)
+    watcher.watch(["employees"], services.invalidate_employee_cache)
+    watcher.start()
+    
     # Configure styles
     styles = configure_styles()
     create_custom_buttons(ttk.Style())
@@ -1225,5 +1610,17 @@ if __name__ == "__main__":
     # Show main dashboard
     main_dashboard()
     
+    if "--first-frame" in sys.argv:
+        # Child of --profile-startup: report once the login screen is drawn
+        root.update()
+        print(f"first_frame_ms={(time.perf_counter() - STARTED) * 1000:.1f}", flush=True)
+        root.destroy()
+        sys.exit()
+    
+    # Calendar and change log upkeep, once the window is up
+    root.after_idle(lambda: executor.submit(database_setup.routine_maintenance))
+    
     # Start the application
     root.mainloop()
+    watcher.stop()
+    executor.shutdown()
@@ -0,0 +1,72 @@
+import json
+
+# ---------- Keyset Pagination ----------
+# Pages are addressed by the sort key of the last (or first) row already
+# shown instead of an OFFSET, so fetching page 500 costs the same index
+# seek as fetching page 1.
+
+PAGE_SIZE = 200
+
+
+class KeysetPager:
+    def __init__(self, select, key_columns, key_index, where="", descending=False,
+                 id_column=None, id_index=None):
+        # select      -- "SELECT ... FROM ... [JOIN ...]" without WHERE/ORDER BY
+        # key_columns -- unique sort key as SQL expressions, e.g. ("date", "time")
+        # key_index   -- positions of those columns in the selected row
+        # where       -- fixed filter with ? placeholders, bound from params
+        # id_column   -- row id as an SQL expression, for fetch_ids()
+        # id_index    -- position of that column in the selected row
+        self.select = select.strip()
+        self.key_columns = tuple(key_columns)
+        self.key_index = tuple(key_index)
+        self.where = where
+        self.descending = descending
+        self.id_column = id_column
+        self.id_index = id_index
+
+    def key(self, row):
+        return tuple(row[i] for i in self.key_index)
+
+    def row_id(self, row):
+        return row[self.id_index]
+
+    def sql(self, after=False, before=False):
+        # after/before say whether a key bound is applied; rows always come
+        # back in display order except for `before`, which runs reversed.
+        forward = not before
+        ascending = forward != self.descending
+        conditions = [self.where] if self.where else []
+        if after or before:
+            columns = ", ".join(self.key_columns)
+            placeholders = ", ".join("?" for _ in self.key_columns)
+            op = ">" if ascending else "<"
+            conditions.append(f"({columns}) {op} ({placeholders})")
+        order = ", ".join(f"{c} {'ASC' if ascending else 'DESC'}" for c in self.key_columns)
+        sql = self.select
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return f"{sql} ORDER BY {order} LIMIT ?"
+
+    def fetch(self, cursor, params=(), after=None, before=None, limit=PAGE_SIZE):
+        # Returns up to `limit` rows in display order, following `after` or
+        # preceding `before` (both are keys as returned by key()).
+        bound = after if after is not None else before
+        args = list(params) + (list(bound) if bound is not None else []) + [limit]
+        cursor.execute(self.sql(after=after is not None, before=before is not None), args)
+        rows = cursor.fetchall()
+        if before is not None:
+            rows.reverse()
+        return rows
+
+    def ids_sql(self):
+        # The ids arrive as one JSON array parameter, so the statement text
+        # (and its cached plan) is the same however many there are.
+        conditions = [self.where] if self.where else []
+        conditions.append(f"{self.id_column} IN (SELECT value FROM json_each(?))")
+        return f"{self.select} WHERE {' AND '.join(conditions)}"
+
+    def fetch_ids(self, cursor, ids, params=()):
+        # Rows with the given ids that pass the filter, in no particular order.
+        cursor.execute(self.ids_sql(), [*params, json.dumps(list(ids))])
+        return cursor.fetchall()
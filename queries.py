@@ -0,0 +1,302 @@
+from paging import KeysetPager
+
+# ---------- Shared SQL ----------
+# Every statement the application runs lives here so the index check in
+# database_setup.check_query_plans() can EXPLAIN exactly what ships.
+
+# Logins
+ADMIN_LOGIN = "SELECT * FROM admins WHERE username=? AND password=?"
+
+# Employees. Lookups by id or email are served from memory by
+# employee_directory, which loads the whole table with ALL_EMPLOYEES.
+ALL_EMPLOYEES = "SELECT id, name, email, phone, Gender, Role FROM employees"
+INSERT_EMPLOYEE = """
+    INSERT INTO employees (name, email, phone, Gender, Role, start_date)
+    VALUES (?, ?, ?, ?, ?, date('now', 'localtime'))
+"""
+DELETE_EMPLOYEE = "DELETE FROM employees WHERE id = ?"
+# Full-text search over name, email, phone and role (employee_search is
+# the FTS5 index from database_setup). FTS5 hands rows back in rowid
+# order, so paging by id needs no sort.
+EMPLOYEE_SEARCH_PAGES = KeysetPager(
+    """SELECT e.id, e.name, e.email, e.phone, e.Gender, e.Role
+       FROM employee_search s
+       JOIN employees e ON e.id = s.rowid""",
+    where="employee_search MATCH ?",
+    key_columns=("s.rowid",), key_index=(0,), id_column="e.id", id_index=0)
+EMPLOYEE_PAGES = KeysetPager(
+    "SELECT id, name, email, phone, Gender, Role FROM employees",
+    key_columns=("id",), key_index=(0,), id_column="id", id_index=0)
+
+# Leaves
+# Names are looked up in employee_directory when the rows are shown.
+PENDING_LEAVE_PAGES = KeysetPager(
+    "SELECT l.id, l.employee_id, l.date, l.reason, l.status FROM leaves l",
+    where="l.status = 'Pending'",
+    key_columns=("l.date", "l.id"), key_index=(2, 0), id_column="l.id", id_index=0)
+# Bulk decisions only touch requests that are still pending, so a request
+# decided meanwhile by someone else is not overwritten.
+DECIDE_PENDING_LEAVE = "UPDATE leaves SET status = ? WHERE id = ? AND status = 'Pending'"
+# Pending requests in [start, end), optionally of one role; served by the
+# partial pending index plus a primary-key probe per row for the role.
+_PENDING_LEAVES_MATCHING = """
+    status = 'Pending' AND date >= :start AND date < :end
+    AND (:role IS NULL OR EXISTS (SELECT 1 FROM employees e
+                                  WHERE e.id = leaves.employee_id AND e.Role = :role))
+"""
+COUNT_PENDING_LEAVES_MATCHING = f"SELECT COUNT(*) FROM leaves WHERE {_PENDING_LEAVES_MATCHING}"
+DECIDE_PENDING_LEAVES_MATCHING = f"UPDATE leaves SET status = :status WHERE {_PENDING_LEAVES_MATCHING}"
+INSERT_LEAVE = """
+    INSERT INTO leaves (employee_id, date, reason, status)
+    VALUES (?, ?, ?, 'Pending')
+"""
+LEAVE_HISTORY_PAGES = KeysetPager(
+    "SELECT date, reason, status, id FROM leaves",
+    where="employee_id = ?",
+    key_columns=("date", "id"), key_index=(0, 3), descending=True,
+    id_column="id", id_index=3)
+
+# Attendance
+# Half-open [start, end) range over the raw date column so the
+# (employee_id, date) index is used; see date_ranges.py. Reads go through
+# all_attendance, the live table plus any archived years (see db.py);
+# writes only ever touch the live table.
+ATTENDANCE_HISTORY_PAGES = KeysetPager(
+    "SELECT date, time, status, id FROM all_attendance",
+    where="employee_id = ? AND date >= ? AND date < ?",
+    key_columns=("date", "time"), key_index=(0, 1), descending=True,
+    id_column="id", id_index=3)
+# Day bitmaps of the months touching a range (see attendance_bitmap.py),
+# months inclusive at both ends.
+SUMMARY_BITS = """
+    SELECT year, month, present_bits, absent_bits, leave_bits
+    FROM attendance_monthly_summary
+    WHERE employee_id = ? AND (year, month) >= (?, ?) AND (year, month) <= (?, ?)
+    ORDER BY year, month
+"""
+# The employee's first month with a recorded day, and its days.
+FIRST_SUMMARY_MONTH = """
+    SELECT year, month, present_bits | absent_bits | leave_bits
+    FROM attendance_monthly_summary
+    WHERE employee_id = ? AND (present_bits | absent_bits | leave_bits) != 0
+    ORDER BY year, month
+    LIMIT 1
+"""
+MONTHLY_SUMMARY_PAGES = KeysetPager(
+    """SELECT s.employee_id, e.name, e.Role, s.present_days, s.absent_days,
+              s.leave_days, s.total_days
+       FROM attendance_monthly_summary s
+       JOIN employees e ON e.id = s.employee_id""",
+    where="s.year = ? AND s.month = ?",
+    key_columns=("s.employee_id",), key_index=(0,))
+# Check-in is a single statement: the unique (employee_id, date) index
+# turns a second check-in the same day into a no-op (rowcount 0), with no
+# window for two clients to both insert. A check-in after the end-of-day
+# close marked the day Absent (see end_of_day.py) replaces that row.
+_PRESENT_OVER_ABSENT = """
+    ON CONFLICT (employee_id, date) DO UPDATE
+    SET time = excluded.time, status = excluded.status
+    WHERE attendance.status = 'Absent' AND excluded.status = 'Present'
+"""
+CHECK_IN = f"""
+    INSERT INTO attendance (employee_id, date, time, status)
+    VALUES (?, ?, ?, 'Present')
+    {_PRESENT_OVER_ABSENT}
+"""
+# Kiosk batches may carry badges of unknown employees; those are skipped.
+BATCH_CHECK_IN = f"""
+    INSERT INTO attendance (employee_id, date, time, status)
+    SELECT ?, ?, ?, 'Present'
+    WHERE EXISTS (SELECT 1 FROM employees WHERE id = ?)
+    {_PRESENT_OVER_ABSENT}
+"""
+# Terminal imports, with the file's status (default 'Present').
+IMPORT_ATTENDANCE = f"""
+    INSERT INTO attendance (employee_id, date, time, status)
+    VALUES (?, ?, ?, ?)
+    {_PRESENT_OVER_ABSENT}
+"""
+# End-of-day close (see end_of_day.py): every employee without a row for
+# a working day gets one, 'On Leave' under an approved leave and 'Absent'
+# otherwise. Employees count from their start date, so a new hire is
+# closed from their first day. :day is the encoded date, :day_iso the ISO
+# one.
+CLOSE_DAY = """
+    INSERT INTO attendance (employee_id, date, time, status)
+    SELECT e.id, :day, :time,
+           CASE WHEN EXISTS (SELECT 1 FROM leaves l
+                             WHERE l.employee_id = e.id AND l.date = :day_iso
+                               AND l.status = 'Approved')
+                THEN 'On Leave' ELSE 'Absent' END
+    FROM employees e
+    WHERE (SELECT working FROM calendar WHERE date = :day_iso)
+      AND e.start_date <= :day_iso
+    ON CONFLICT (employee_id, date) DO NOTHING
+"""
+WORKING_DAYS = "SELECT date FROM calendar WHERE date >= ? AND date < ? AND working ORDER BY date"
+
+# Reports. Rows come out in (employee, newest date first) order, which is
+# exactly the index order, so they stream without a temp sort; filters
+# left as NULL are ignored. The attendance export runs once per attendance
+# table ({attendance}: the live one and each archive) and report_export
+# merges the streams, since a sort over the combined view would need a
+# temp B-tree.
+ATTENDANCE_EXPORT = """
+    SELECT a.employee_id, e.name, e.Role, a.date, a.time, a.status
+    FROM {attendance} a
+    JOIN employees e ON e.id = a.employee_id
+    WHERE a.date >= :start AND a.date < :end
+      AND (:role IS NULL OR e.Role = :role)
+      AND (:employee_id IS NULL OR a.employee_id = :employee_id)
+    ORDER BY a.employee_id, a.date DESC, a.time DESC
+"""
+ATTENDANCE_EXPORT_COLUMNS = ("employee_id", "name", "role", "date", "time", "status")
+LEAVE_EXPORT = """
+    SELECT l.employee_id, e.name, e.Role, l.date, l.reason, l.status
+    FROM leaves l
+    JOIN employees e ON e.id = l.employee_id
+    WHERE l.date >= :start AND l.date < :end
+      AND (:role IS NULL OR e.Role = :role)
+      AND (:employee_id IS NULL OR l.employee_id = :employee_id)
+    ORDER BY l.employee_id, l.date DESC
+"""
+LEAVE_EXPORT_COLUMNS = ("employee_id", "name", "role", "date", "reason", "status")
+
+# Change log (see database_setup.create_change_log). MIN/MAX of the
+# INTEGER PRIMARY KEY are single B-tree probes.
+CHANGE_LOG_POSITION = "SELECT MAX(seq) FROM change_log"
+CHANGE_LOG_START = "SELECT MIN(seq) FROM change_log"
+# Per-table change counter: the newest seq of that table.
+TABLE_VERSION = "SELECT MAX(seq) FROM change_log WHERE table_name = ?"
+CHANGED_ROW_IDS = """
+    SELECT row_id FROM change_log
+    WHERE table_name = ? AND seq > ? AND seq <= ?
+"""
+
+# Working-day calendar (see work_calendar.py)
+CALENDAR_BOUNDS = "SELECT MIN(date), MAX(date) FROM calendar"
+FIRST_SUMMARY_YEAR = "SELECT MIN(year) FROM attendance_monthly_summary"
+INSERT_CALENDAR_DAY = """
+    INSERT OR IGNORE INTO calendar (date, day, weekday, weekday_name, working)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SET_HOLIDAY = "UPDATE calendar SET holiday = ?, working = 0 WHERE date = ?"
+CLEAR_HOLIDAY = "UPDATE calendar SET holiday = NULL, working = ? WHERE date = ?"
+HOLIDAYS = """
+    SELECT date, weekday_name, holiday FROM calendar
+    WHERE holiday IS NOT NULL AND date >= ? AND date < ?
+    ORDER BY date
+"""
+# Recounts working_before for every day after a fill or holiday change.
+NUMBER_WORKING_DAYS = """
+    UPDATE calendar SET working_before = numbered.before
+    FROM (SELECT date, COALESCE(SUM(working) OVER (
+                 ORDER BY date ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS before
+          FROM calendar) AS numbered
+    WHERE calendar.date = numbered.date
+"""
+# Present / absent / on-leave days over [:start, :end) of one employee
+# ({employee} is "= :employee_id") or all of them ("IS NOT NULL"):
+#   - days with an attendance row count as that row's status
+#   - working days without one count as on leave when an approved leave
+#     covers them, otherwise as absent once the day is over (< :until)
+# An employee's days start at their first attendance row, which the
+# end-of-day close writes from their start_date on. {key} is the calendar
+# column matching the attendance date encoding and {first_day} the
+# employee's first attendance date (see work_calendar.attendance_counts).
+# The three parts are separate queries that each walk an index in
+# employee order, so none of them sorts or materializes attendance.
+#
+# Working days each employee is counted over, by id.
+ATTENDANCE_SPANS = """
+    SELECT employee_id,
+           MAX(0, (SELECT working_before FROM calendar WHERE {key} = :until)
+                  - (SELECT working_before FROM calendar c WHERE c.{key} = first_day))
+    FROM (SELECT e.id AS employee_id,
+                 MIN(MAX(:start, COALESCE({first_day}, :until)), :until) AS first_day
+          FROM employees e
+          WHERE e.id {employee})
+    ORDER BY employee_id
+"""
+# Recorded days per employee in one attendance table ({source}); the
+# archives are added up in Python.
+ATTENDANCE_COUNTS = """
+    SELECT a.employee_id,
+           SUM(a.status = 'Present'),
+           SUM(a.status = 'Absent'),
+           SUM(a.status = 'On Leave'),
+           SUM(c.working AND a.date < :until)
+    FROM {source} a
+    JOIN calendar c ON c.{key} = a.date
+    WHERE a.employee_id {employee} AND a.date >= :start AND a.date < :end
+    GROUP BY a.employee_id
+"""
+# Working days from the first day on with an approved leave and no
+# attendance row, in all and before :until. Leaves are matched on ISO
+# dates; a day with several approved leaves counts once.
+UNRECORDED_LEAVE_DAYS = """
+    SELECT l.employee_id, COUNT(*), SUM(c.{key} < :until)
+    FROM employees e
+    JOIN leaves l ON l.employee_id = e.id
+    JOIN calendar c ON c.date = l.date
+    WHERE e.id {employee} AND l.status = 'Approved' AND c.working
+      AND l.date >= :start_date AND l.date < :end_date
+      AND c.{key} >= MIN(MAX(:start, COALESCE({first_day}, :until)), :until)
+      AND NOT EXISTS (SELECT 1 FROM leaves newer
+                      WHERE newer.employee_id = l.employee_id AND newer.date = l.date
+                        AND newer.id > l.id AND newer.status = 'Approved')
+      AND NOT EXISTS (SELECT 1 FROM all_attendance a
+                      WHERE a.employee_id = l.employee_id AND a.date = c.{key})
+    GROUP BY l.employee_id
+"""
+# An employee's first attendance date in one attendance table; the MIN
+# is read off the end of the (employee_id, date DESC) index.
+FIRST_ATTENDANCE = "(SELECT MIN(date) FROM {source} WHERE employee_id = e.id)"
+# The smallest non-NULL of several such values, as "(a), (b), ..."
+EARLIEST = "(SELECT MIN(column1) FROM (VALUES {values}))"
+
+# Company heatmap (see attendance_heatmap.py), from each attendance table
+# ({attendance}) in turn. An employee's days come back packed into one
+# string, a character per row with code point 64 + 4 * day offset +
+# status code, so Python handles one value per employee rather than one
+# per row and numpy unpacks them all at once. {day} is the date as a
+# Julian day number.
+HEATMAP_ATTENDANCE = """
+    SELECT a.employee_id,
+           group_concat(char(64 + 4 * ({day} - :first)
+                             + CASE a.status WHEN 'Present' THEN 1
+                                             WHEN 'On Leave' THEN 2 ELSE 3 END), '')
+    FROM employees e
+    JOIN {attendance} a ON a.employee_id = e.id
+    WHERE a.date >= :start AND a.date < :end
+    GROUP BY a.employee_id
+"""
+# Every day of [?, ?) as (Julian day number, working), for the heatmap's
+# weekend and holiday columns.
+CALENDAR_DAYS = "SELECT day, working FROM calendar WHERE date >= ? AND date < ? ORDER BY date"
+# Weekends and holidays in [?, ?) as Julian day numbers, which streaks
+# skip over (see attendance_bitmap.py).
+OFF_DAYS = "SELECT day FROM calendar WHERE date >= ? AND date < ? AND NOT working"
+# One employee's approved leave days in [?, ?) as Julian day numbers.
+APPROVED_LEAVE_DAYS = """
+    SELECT c.day
+    FROM leaves l
+    JOIN calendar c ON c.date = l.date
+    WHERE l.employee_id = ? AND l.status = 'Approved' AND l.date >= ? AND l.date < ?
+"""
+
+# Archiving a closed year (see archive.py); {schema} is the attached
+# archive file. These walk the whole live table once per archived year.
+ARCHIVE_HAS_YEAR = "SELECT EXISTS (SELECT 1 FROM main.attendance WHERE date >= ? AND date < ?)"
+ARCHIVE_COPY_YEAR = """
+    INSERT OR IGNORE INTO {schema}.attendance (id, employee_id, date, time, status)
+    SELECT id, employee_id, date, time, status FROM main.attendance
+    WHERE date >= ? AND date < ?
+"""
+ARCHIVE_MISSING_ROWS = """
+    SELECT COUNT(*) FROM main.attendance m
+    WHERE m.date >= ? AND m.date < ?
+      AND NOT EXISTS (SELECT 1 FROM {schema}.attendance a WHERE a.id = m.id)
+"""
+ARCHIVE_DELETE_YEAR = "DELETE FROM main.attendance WHERE date >= ? AND date < ?"
+ARCHIVE_ROW_COUNT = "SELECT COUNT(*), MIN(date), MAX(date) FROM {schema}.attendance"
@@ -0,0 +1,306 @@
+import re
+import sqlite3
+from datetime import date, datetime
+from typing import Callable, Iterable
+
+from db import get_connection, transaction
+from paging import PAGE_SIZE, KeysetPager
+import queries
+import date_ranges
+import date_codec
+import checkin
+import work_calendar
+import attendance_bitmap
+from employee_directory import Employee, directory
+
+# ---------- Attendance Service ----------
+# Everything the Tk screens do to the database, without Tk: logins,
+# employee CRUD, leaves, check-in and history. Batch jobs, the CLI tools
+# and benchmarks call these same functions.
+
+LEAVE_STATUSES = ("Pending", "Approved", "Rejected")
+
+
+class ServiceError(Exception):
+    pass
+
+
+class DuplicateEmailError(ServiceError):
+    pass
+
+
+class EmployeeNotFoundError(ServiceError):
+    pass
+
+
+# Sort keys of paged rows, for VirtualTreeview.row_key
+employee_row_key = queries.EMPLOYEE_PAGES.key
+pending_leave_row_key = queries.PENDING_LEAVE_PAGES.key
+leave_history_row_key = queries.LEAVE_HISTORY_PAGES.key
+attendance_row_key = queries.ATTENDANCE_HISTORY_PAGES.key
+monthly_summary_row_key = queries.MONTHLY_SUMMARY_PAGES.key
+
+
+# ---------- Logins ----------
+def authenticate_admin(username: str, password: str) -> bool:
+    cursor = get_connection().cursor()
+    cursor.execute(queries.ADMIN_LOGIN, (username, password))
+    return cursor.fetchone() is not None
+
+
+def find_employee_by_email(email: str) -> tuple[int, str] | None:
+    # (id, name) of the employee with this email, as the login screen needs.
+    employee = directory.by_email(email)
+    return (employee.id, employee.name) if employee else None
+
+
+# ---------- Employees ----------
+def is_valid_email(email: str) -> bool:
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+
+def is_valid_phone(phone: str) -> bool:
+    pattern = r'^\+?1?\d{9,15}$'
+    return re.match(pattern, phone) is not None
+
+
+def add_employee(name: str, email: str, phone: str, gender: str, role: str) -> int:
+    # The directory answers the common duplicate case without a query; the
+    # UNIQUE email column catches one added elsewhere since it was loaded.
+    duplicate = DuplicateEmailError("An employee with this email already exists")
+    if directory.by_email(email) is not None:
+        raise duplicate
+    try:
+        with transaction() as conn:
+            employee_id = conn.execute(queries.INSERT_EMPLOYEE,
+                                       (name, email, phone, gender, role)).lastrowid
+    except sqlite3.IntegrityError:
+        raise duplicate from None
+    finally:
+        directory.invalidate()
+    return employee_id
+
+
+def delete_employee(employee_id: int) -> None:
+    try:
+        with transaction() as conn:
+            deleted = conn.execute(queries.DELETE_EMPLOYEE, (employee_id,)).rowcount
+    finally:
+        directory.invalidate()
+    if not deleted:
+        raise EmployeeNotFoundError("Employee ID not found")
+
+
+def get_employee(employee_id: int) -> Employee | None:
+    return directory.get(employee_id)
+
+
+def employee_name(employee_id: int) -> str:
+    return directory.name(employee_id)
+
+
+def search_query(text: str) -> str:
+    # Free text as typed -> FTS5 query: every word must prefix-match some
+    # column. Quoting each word keeps punctuation from being read as FTS
+    # syntax; text without any word matches nothing.
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words) or '""'
+
+
+def search_employees(text: str, after: tuple | None = None, before: tuple | None = None,
+                     limit: int = PAGE_SIZE) -> list[tuple]:
+    # Employees matching `text`, in id order, a page at a time.
+    return queries.EMPLOYEE_SEARCH_PAGES.fetch(get_connection().cursor(), (search_query(text),),
+                                               after=after, before=before, limit=limit)
+
+
+def invalidate_employee_cache() -> None:
+    # For employees changed by another process; reloaded on next use.
+    directory.invalidate()
+
+
+def employee_ids() -> frozenset[int]:
+    return frozenset(employee.id for employee in directory.page())
+
+
+def employee_page(after: tuple | None = None, before: tuple | None = None,
+                  limit: int = PAGE_SIZE) -> list[tuple]:
+    # Served from the directory, in the same id order as EMPLOYEE_PAGES.
+    return directory.page(after=after, before=before, limit=limit)
+
+
+# ---------- Leaves ----------
+def submit_leave(employee_id: int, leave_date: str, reason: str) -> int:
+    # Raises ValueError unless leave_date is 'YYYY-MM-DD'.
+    date_ranges.parse_date(leave_date)
+    with transaction() as conn:
+        return conn.execute(queries.INSERT_LEAVE, (employee_id, leave_date, reason)).lastrowid
+
+
+def is_upcoming(leave_date: str) -> bool:
+    return date_ranges.parse_date(leave_date) >= date.today()
+
+
+def _check_leave_status(status: str) -> None:
+    if status not in LEAVE_STATUSES:
+        raise ValueError(f"Unknown leave status '{status}'")
+
+
+def set_leave_statuses(leave_ids: Iterable[int], status: str) -> int:
+    # Decides many pending requests in one transaction; returns how many
+    # were still pending and got updated.
+    _check_leave_status(status)
+    rows = [(status, leave_id) for leave_id in leave_ids]
+    if not rows:
+        return 0
+    with transaction() as conn:
+        return conn.executemany(queries.DECIDE_PENDING_LEAVE, rows).rowcount
+
+
+def _matching_params(start: str | None, end: str | None, role: str | None) -> dict:
+    # start/end are inclusive 'YYYY-MM-DD' days, either may be blank
+    range_start, range_end = date_ranges.between(start, end)
+    return {"start": range_start, "end": range_end, "role": role or None}
+
+
+def count_pending_leaves_matching(start: str | None = None, end: str | None = None,
+                                  role: str | None = None) -> int:
+    cursor = get_connection().cursor()
+    cursor.execute(queries.COUNT_PENDING_LEAVES_MATCHING, _matching_params(start, end, role))
+    return cursor.fetchone()[0]
+
+
+def set_pending_leaves_matching(status: str, start: str | None = None, end: str | None = None,
+                                role: str | None = None) -> int:
+    # Decides every pending request in the date range (and role) with one
+    # statement; returns how many were updated.
+    _check_leave_status(status)
+    params = _matching_params(start, end, role)
+    with transaction() as conn:
+        return conn.execute(queries.DECIDE_PENDING_LEAVES_MATCHING,
+                            {**params, "status": status}).rowcount
+
+
+def pending_leave_page(after: tuple | None = None, before: tuple | None = None,
+                       limit: int = PAGE_SIZE) -> list[tuple]:
+    # (id, employee_id, date, reason, status); see employee_name().
+    return queries.PENDING_LEAVE_PAGES.fetch(get_connection().cursor(),
+                                             after=after, before=before, limit=limit)
+
+
+def leave_history_page(employee_id: int, after: tuple | None = None,
+                       before: tuple | None = None, limit: int = PAGE_SIZE) -> list[tuple]:
+    # (date, reason, status, id) rows, newest first; one index range per
+    # page however long the history is.
+    return queries.LEAVE_HISTORY_PAGES.fetch(get_connection().cursor(), (employee_id,),
+                                             after=after, before=before, limit=limit)
+
+
+# ---------- Attendance ----------
+def check_in(employee_id: int, when: datetime | None = None) -> bool:
+    # False if the day was already marked.
+    return checkin.check_in(employee_id, when)
+
+
+def batch_check_in(checkins: Iterable[tuple[int, datetime]]) -> tuple[int, int]:
+    # (recorded, skipped) for a kiosk's buffered check-ins.
+    return checkin.batch_check_in(checkins)
+
+
+def group_check_in(checkins: Iterable[tuple[int, datetime]]) -> list[bool]:
+    # Whether each check-in was recorded, all in one commit.
+    return checkin.group_check_in(checkins)
+
+
+def attendance_history_page(employee_id: int, start: str, end: str,
+                            after: tuple | None = None, before: tuple | None = None,
+                            limit: int = PAGE_SIZE) -> list[tuple]:
+    # (date, time, status, id) rows in [start, end), newest first, with
+    # date and time as stored (see date_codec.display_date()).
+    bounds = date_codec.codec().range(start, end)
+    return queries.ATTENDANCE_HISTORY_PAGES.fetch(get_connection().cursor(),
+                                                  (employee_id, *bounds),
+                                                  after=after, before=before, limit=limit)
+
+
+def attendance_streaks(employee_id: int, start: str, end: str) -> tuple[int, int, int]:
+    # (current present streak, longest present streak, longest absence
+    # streak) in working days; see attendance_bitmap.streaks().
+    return attendance_bitmap.streaks(employee_id, start, end)
+
+
+def attendance_counts(employee_id: int, start: str, end: str) -> tuple[int, int, int, int]:
+    # (present, absent, on leave, working days) in [start, end), counting
+    # unrecorded working days as absent or on leave; see work_calendar.py.
+    rows = work_calendar.attendance_counts(start, end, employee_id)
+    return tuple(rows[0][1:]) if rows else (0, 0, 0, 0)
+
+
+def company_attendance_counts(start: str, end: str) -> list[tuple]:
+    # (employee_id, present, absent, on leave, working days) per employee.
+    return work_calendar.attendance_counts(start, end)
+
+
+def monthly_summary_page(year: int, month: int,
+                         after: tuple | None = None, before: tuple | None = None,
+                         limit: int = PAGE_SIZE) -> list[tuple]:
+    return queries.MONTHLY_SUMMARY_PAGES.fetch(get_connection().cursor(), (year, month),
+                                               after=after, before=before, limit=limit)
+
+
+# ---------- Change Feeds ----------
+class ChangeFeed:
+    # What changed in one table since a change_log position, and the
+    # current rows of those ids as a paged list shows them. Lets a
+    # VirtualTreeview refresh by diff instead of reloading.
+    def __init__(self, table: str, pager: KeysetPager,
+                 params: Callable[[], tuple] = tuple) -> None:
+        # params() -- the pager's filter params at refresh time
+        self.table = table
+        self.pager = pager
+        self.params = params
+        self.row_id = pager.row_id
+
+    def position(self) -> int:
+        return get_connection().execute(queries.CHANGE_LOG_POSITION).fetchone()[0] or 0
+
+    def changed_ids(self, since: int) -> tuple[int, set[int]] | None:
+        # (new position, ids changed after `since`); None when the log no
+        # longer reaches back to `since` and the list has to reload.
+        cursor = get_connection().cursor()
+        position = self.position()
+        start = cursor.execute(queries.CHANGE_LOG_START).fetchone()[0]
+        if since > position or (start is not None and since < start - 1):
+            return None
+        cursor.execute(queries.CHANGED_ROW_IDS, (self.table, since, position))
+        return position, {row_id for (row_id,) in cursor}
+
+    def rows(self, ids: Iterable[int]) -> list[tuple]:
+        # Rows of these ids still in the list; the rest were deleted or
+        # filtered out (e.g. a leave that is no longer pending).
+        return self.pager.fetch_ids(get_connection().cursor(), ids, self.params())
+
+
+def employee_changes() -> ChangeFeed:
+    return ChangeFeed("employees", queries.EMPLOYEE_PAGES)
+
+
+def employee_search_changes(text: str) -> ChangeFeed:
+    return ChangeFeed("employees", queries.EMPLOYEE_SEARCH_PAGES,
+                      lambda: (search_query(text),))
+
+
+def pending_leave_changes() -> ChangeFeed:
+    return ChangeFeed("leaves", queries.PENDING_LEAVE_PAGES)
+
+
+def leave_history_changes(employee_id: int) -> ChangeFeed:
+    return ChangeFeed("leaves", queries.LEAVE_HISTORY_PAGES, lambda: (employee_id,))
+
+
+def attendance_history_changes(employee_id: int,
+                               date_range: Callable[[], tuple[str, str]]) -> ChangeFeed:
+    # date_range() -- the [start, end) the history list currently shows
+    return ChangeFeed("attendance", queries.ATTENDANCE_HISTORY_PAGES,
+                      lambda: (employee_id, *date_codec.codec().range(*date_range())))
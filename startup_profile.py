@@ -0,0 +1,70 @@
+import json
+import re
+import subprocess
+import sys
+import time
+
+# ---------- Startup Profile ----------
+# `python main_app.py --profile-startup` runs the app once in a child
+# process under `python -X importtime`, lets it draw the login screen and
+# exit, then reports time-to-first-frame and what each top-level import
+# cost. Add --json for machine-readable output.
+
+TOP_IMPORTS = 15
+
+# "import time:  self [us] | cumulative | imported package"; nested
+# imports are indented under their parent, top-level ones are not.
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def parse_import_times(stderr):
+    # (module, self ms, cumulative ms) of each top-level import
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and not match.group(3):
+            own, cumulative, _, module = match.groups()
+            imports.append((module, int(own) / 1000, int(cumulative) / 1000))
+    return imports
+
+
+def _main_app_imports(imports):
+    # The interpreter's own startup imports end with `site`; main_app runs
+    # as __main__, so everything it pulls in is listed after that.
+    modules = [entry[0] for entry in imports]
+    if "site" in modules:
+        return imports[modules.index("site") + 1:]
+    return imports
+
+
+def measure(script):
+    started = time.perf_counter()
+    child = subprocess.run([sys.executable, "-X", "importtime", script, "--first-frame"],
+                           capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if child.returncode != 0:
+        raise RuntimeError(child.stderr.strip().splitlines()[-1] if child.stderr.strip()
+                           else f"exited with status {child.returncode}")
+
+    first_frame = re.search(r"first_frame_ms=([\d.]+)", child.stdout)
+    imports = _main_app_imports(parse_import_times(child.stderr))
+    imports.sort(key=lambda entry: entry[2], reverse=True)
+    return {
+        "first_frame_ms": float(first_frame.group(1)) if first_frame else None,
+        "process_wall_ms": round(wall_ms, 1),
+        "imports_ms": round(sum(entry[2] for entry in imports), 1),
+        "imports": [{"module": module, "self_ms": round(own, 1), "cumulative_ms": round(total, 1)}
+                    for module, own, total in imports],
+    }
+
+
+def profile(script):
+    result = measure(script)
+    if "--json" in sys.argv:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"Time to first frame: {result['first_frame_ms']} ms "
+          f"(from main_app start; {result['process_wall_ms']} ms including interpreter)")
+    print(f"Top-level imports:   {result['imports_ms']} ms")
+    for entry in result["imports"][:TOP_IMPORTS]:
+        print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
@@ -0,0 +1,158 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import db
+import date_codec
+import date_ranges
+import services
+import archive
+import end_of_day
+import work_calendar
+from benchmarks.generate_data import generate
+
+# ---------- Test Databases ----------
+# A small generated database (5 employees, ~4 years) in each date
+# encoding, and one with its oldest full year archived. Some days are
+# closed so explicit Absent rows exist, a holiday is set, and one
+# employee has no attendance at all.
+
+SCALE = 0.0005
+
+
+def _date(iso, unbounded):
+    # date_ranges.MIN_DATE / MAX_DATE stand for no bound
+    if iso in (date_ranges.MIN_DATE, date_ranges.MAX_DATE):
+        return unbounded
+    return date.fromisoformat(iso)
+
+
+def _build(path, kind):
+    generate(str(path), SCALE, quiet=True, integer_dates=kind == "integer")
+    services.invalidate_employee_cache()
+    today = date.today()
+    work_calendar.set_holiday(f"{today.year - 1}-12-25", "Christmas Day")
+    end_of_day.close_days((today - timedelta(days=60)).isoformat(),
+                          (today - timedelta(days=30)).isoformat())
+    services.add_employee("New Hire", "new.hire@example.com", "9000000000", "Other", "HR")
+    if kind == "archived":
+        year = today.year - 3
+        end_of_day.close_days(f"{year}-06-01", f"{year}-08-01")
+        assert archive.archive_year(year)
+    return Model()
+
+
+class Model:
+    # The rules counts and streaks follow, applied day by day to the raw
+    # tables.
+    def __init__(self):
+        conn = db.get_connection()
+        iso_date = date_codec.codec().iso_date
+        self.path = db.DB_PATH
+        self.status = {(employee, iso_date(day)): status for employee, day, status in
+                       conn.execute("SELECT employee_id, date, status FROM all_attendance")}
+        self.leaves = set(conn.execute(
+            "SELECT employee_id, date FROM leaves WHERE status = 'Approved'").fetchall())
+        self.off = {day for (day,) in conn.execute("SELECT date FROM calendar WHERE NOT working")}
+        self.calendar_start = date.fromisoformat(
+            conn.execute("SELECT MIN(date) FROM calendar").fetchone()[0])
+        self.first = {}
+        for employee, day in self.status:
+            self.first[employee] = min(self.first.get(employee, day), day)
+        self.employees = [employee for (employee,) in
+                          conn.execute("SELECT id FROM employees ORDER BY id")]
+
+    def day_status(self, employee, day):
+        # Status of a working day, or None for a day off without a row
+        iso = day.isoformat()
+        recorded = self.status.get((employee, iso))
+        if recorded or iso in self.off:
+            return recorded
+        return "On Leave" if (employee, iso) in self.leaves else "Absent"
+
+    def counts(self, employee, start, end):
+        # (present, absent, on_leave, working_days) over [start, end)
+        today = date.today()
+        start = max(_date(start, self.calendar_start), self.calendar_start)
+        end = min(_date(end, date.max), today + timedelta(days=1))
+        until = min(end, today)
+        first = min(max(start, date.fromisoformat(self.first.get(employee, until.isoformat()))),
+                    until)
+        present = absent = on_leave = working = 0
+        day = start
+        while day < end:
+            iso = day.isoformat()
+            recorded = self.status.get((employee, iso))
+            if recorded is None and (day < first or iso in self.off):
+                pass
+            elif recorded is None and day >= until:
+                # Today without a row is only counted when on leave
+                on_leave += (employee, iso) in self.leaves
+            else:
+                status = self.day_status(employee, day)
+                present += status == "Present"
+                absent += status == "Absent"
+                on_leave += status == "On Leave"
+            if first <= day < until and iso not in self.off:
+                working += 1
+            day += timedelta(days=1)
+        return present, absent, on_leave, working
+
+    def streaks(self, employee, start, end):
+        # (current present streak, longest present, longest absent)
+        if employee not in self.first:
+            return 0, 0, 0
+        today = date.today()
+        first = max(date.fromisoformat(self.first[employee]), _date(start, date.min))
+        last = min(today, _date(end, date.max) - timedelta(days=1))
+        if last == today and (employee, today.isoformat()) not in self.status:
+            last -= timedelta(days=1)
+        statuses = []
+        day = first
+        while day <= last:
+            if day.isoformat() not in self.off:
+                statuses.append(self.day_status(employee, day))
+            day += timedelta(days=1)
+        longest_present = longest_absent = present_run = absent_run = 0
+        for status in statuses:
+            present_run = present_run + 1 if status == "Present" else 0
+            absent_run = absent_run + 1 if status == "Absent" else 0
+            longest_present = max(longest_present, present_run)
+            longest_absent = max(longest_absent, absent_run)
+        current = 0
+        for status in reversed(statuses):
+            if status != "Present":
+                break
+            current += 1
+        return current, longest_present, longest_absent
+
+
+@pytest.fixture(scope="module", params=["text", "integer", "archived"])
+def built(request, tmp_path_factory):
+    path = tmp_path_factory.mktemp(request.param) / "attendance.db"
+    model = _build(path, request.param)
+    yield model
+    db.close_all()
+
+
+@pytest.fixture
+def model(built):
+    db.set_database_path(built.path)
+    services.invalidate_employee_cache()
+    return built
+
+
+@pytest.fixture
+def ranges():
+    # ranges(count, seed): the unbounded range, then `count` random
+    # [start, end) ranges over the generated years and a little past today
+    def generate_ranges(count, seed):
+        rng = random.Random(seed)
+        low = date(date.today().year - 5, 1, 1).toordinal()
+        high = (date.today() + timedelta(days=30)).toordinal()
+        yield date_ranges.MIN_DATE, date_ranges.MAX_DATE
+        for _ in range(count):
+            first, last = sorted(rng.sample(range(low, high), 2))
+            yield date.fromordinal(first).isoformat(), date.fromordinal(last).isoformat()
+    return generate_ranges
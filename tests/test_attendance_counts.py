@@ -0,0 +1,24 @@
+import random
+
+import work_calendar
+
+
+def test_counts_of_one_employee(model, ranges):
+    rng = random.Random(1)
+    for start, end in ranges(150, seed=2):
+        employee = rng.choice(model.employees)
+        rows = work_calendar.attendance_counts(start, end, employee)
+        got = tuple(rows[0][1:]) if rows else (0, 0, 0, 0)
+        assert got == model.counts(employee, start, end), (employee, start, end)
+
+
+def test_counts_of_everyone(model, ranges):
+    for start, end in ranges(15, seed=3):
+        rows = work_calendar.attendance_counts(start, end)
+        if not rows:
+            assert all(model.counts(employee, start, end) == (0, 0, 0, 0)
+                       for employee in model.employees)
+            continue
+        assert [row[0] for row in rows] == model.employees
+        for employee, *counts in rows:
+            assert tuple(counts) == model.counts(employee, start, end), (employee, start, end)
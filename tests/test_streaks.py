@@ -0,0 +1,21 @@
+import random
+
+import attendance_bitmap
+import work_calendar
+
+
+def test_streaks_match_the_day_by_day_rules(model, ranges):
+    rng = random.Random(4)
+    for start, end in ranges(200, seed=5):
+        employee = rng.choice(model.employees)
+        got = attendance_bitmap.streaks(employee, start, end)
+        assert got == model.streaks(employee, start, end), (employee, start, end)
+
+
+def test_longest_absence_fits_in_absent_days(model, ranges):
+    rng = random.Random(6)
+    for start, end in ranges(50, seed=7):
+        employee = rng.choice(model.employees)
+        rows = work_calendar.attendance_counts(start, end, employee)
+        absent = rows[0][2] if rows else 0
+        assert attendance_bitmap.streaks(employee, start, end)[2] <= absent
@@ -0,0 +1,273 @@
+from tkinter import ttk
+
+from paging import PAGE_SIZE
+from background import show_database_error
+
+# ---------- Virtual Treeview ----------
+# A Treeview that only ever holds a bounded window of rows. Pages are pulled
+# with keyset pagination as the user scrolls towards either edge, and rows
+# that fall far outside the window are dropped again.
+
+MAX_ROWS = 5 * PAGE_SIZE    # rows kept materialized at most
+EDGE = 0.1                  # fetch more when the view is this close to an edge
+
+
+class VirtualTreeview(ttk.Frame):
+    def __init__(self, parent, columns, fetch_page, row_key, format_row=None,
+                 page_size=PAGE_SIZE, max_rows=MAX_ROWS, executor=None,
+                 changes=None, descending=False, **tree_options):
+        # fetch_page(after=key, before=key, limit=n) -> raw rows in display order
+        # row_key(raw_row) -> sort key of that row
+        # format_row(raw_row) -> values to display (defaults to the row itself)
+        # executor -- background.QueryExecutor; pages are fetched inline without one
+        # changes -- services.ChangeFeed; refresh() then applies only the rows
+        #            changed since the last load instead of reloading
+        # descending -- rows are shown in descending row_key order
+        super().__init__(parent)
+        self.fetch_page = fetch_page
+        self.executor = executor
+        self.row_key = row_key
+        self.changes = changes
+        self.descending = descending
+        self.format_row = format_row or (lambda row: row)
+        self.page_size = page_size
+        self.max_rows = max(max_rows, 2 * page_size)
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', **tree_options)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(expand=True, fill="both")
+
+        self._keys = {}             # item id -> sort key
+        self._more_before = False
+        self._more_after = False
+        self._loading = False       # a page fetch is scheduled or in flight
+        self._idle_id = None
+        self._position = None       # change_log position of the loaded rows
+
+    # ---------- Loading ----------
+    def _fetch(self, after, before, apply):
+        # Fetch one page and apply it on the Tk thread.
+        limit = self.page_size
+        self._submit(lambda: self.fetch_page(after=after, before=before, limit=limit), apply)
+
+    def _submit(self, work, apply):
+        # Run work inline or on the executor, then apply its result.
+        self._loading = True
+
+        def done(result):
+            self._loading = False
+            apply(result)
+
+        def failed(error):
+            self._loading = False
+            show_database_error(error, parent=self)
+
+        if self.executor is None:
+            try:
+                result = work()
+            except Exception as error:
+                failed(error)
+                return
+            done(result)
+        else:
+            # One key per list: a reload supersedes any page still in flight.
+            self.executor.submit(work, done, failed, key=("virtual-tree", str(self)), owner=self)
+
+    def reload(self):
+        if self._idle_id is not None:
+            self.after_cancel(self._idle_id)
+            self._idle_id = None
+        # Until the new rows arrive the loaded ones are stale: a refresh()
+        # meanwhile (e.g. a change watcher tick) must reload too, not diff
+        # against the old position and supersede this reload
+        self._position = None
+        changes = self.changes
+        limit = self.page_size
+
+        def work():
+            # Position first: a change racing the page is applied again by
+            # the next refresh, which is harmless.
+            position = changes.position() if changes is not None else None
+            return position, self.fetch_page(after=None, before=None, limit=limit)
+
+        self._submit(work, self._show_first_page)
+
+    def _show_first_page(self, result):
+        self._position, rows = result
+        self.tree.delete(*self.tree.get_children())
+        self._keys.clear()
+        self._more_before = False
+        self._append(rows)
+        self._more_after = len(rows) == self.page_size
+
+    def _item_id(self, row):
+        # Rows of a change-tracked list are Treeview items named by row id.
+        return str(self.changes.row_id(row)) if self.changes is not None else None
+
+    def _insert(self, row, index):
+        item = self._item_id(row)
+        if item is not None and self.tree.exists(item):
+            return      # already added by a refresh
+        item = self.tree.insert("", index, iid=item, values=self.format_row(row))
+        self._keys[item] = self.row_key(row)
+
+    def _append(self, rows):
+        for row in rows:
+            self._insert(row, "end")
+
+    def _prepend(self, rows):
+        for row in reversed(rows):
+            self._insert(row, 0)
+
+    def load_more(self):
+        # Next page now, for a "Load More" button; scrolling does the same.
+        if self._more_after and not self._loading:
+            self._load_after()
+
+    def _load_after(self):
+        children = self.tree.get_children()
+        if children:
+            self._fetch(self._keys[children[-1]], None, self._show_next_page)
+
+    def _show_next_page(self, rows):
+        children = self.tree.get_children()
+        self._more_after = len(rows) == self.page_size
+        if not rows:
+            return
+        first, _ = self.tree.yview()
+        top_index = int(round(first * len(children)))
+        self._append(rows)
+        dropped = self._trim(from_top=True)
+        if dropped:
+            self._more_before = True
+            self._restore_view(top_index - dropped)
+
+    def _load_before(self):
+        children = self.tree.get_children()
+        if children:
+            self._fetch(None, self._keys[children[0]], self._show_previous_page)
+
+    def _show_previous_page(self, rows):
+        children = self.tree.get_children()
+        self._more_before = len(rows) == self.page_size
+        if not rows:
+            return
+        first, _ = self.tree.yview()
+        top_index = int(round(first * len(children)))
+        self._prepend(rows)
+        if self._trim(from_top=False):
+            self._more_after = True
+        self._restore_view(top_index + len(rows))
+
+    def _trim(self, from_top):
+        children = self.tree.get_children()
+        excess = len(children) - self.max_rows
+        if excess <= 0:
+            return 0
+        doomed = children[:excess] if from_top else children[-excess:]
+        for item in doomed:
+            del self._keys[item]
+        self.tree.delete(*doomed)
+        return excess
+
+    def _restore_view(self, top_index):
+        # Keep the same rows under the cursor after the window shifted.
+        count = len(self.tree.get_children())
+        if count:
+            self.tree.yview_moveto(max(0, top_index) / count)
+
+    # ---------- Refreshing ----------
+    def refresh(self):
+        # Bring the loaded rows up to date, touching only rows that changed
+        # and keeping the selection and scroll position. Lists without a
+        # change feed, or not loaded yet, simply reload.
+        if self.changes is None or self._position is None:
+            self.reload()
+            return
+        changes = self.changes
+        since = self._position
+
+        def work():
+            changed = changes.changed_ids(since)
+            if changed is None:
+                return None
+            position, ids = changed
+            return position, ids, changes.rows(ids) if ids else []
+
+        self._submit(work, self._apply_changes)
+
+    def _apply_changes(self, result):
+        if result is None:
+            self.reload()       # too far behind the change log
+            return
+        self._position, ids, rows = result
+        if not ids:
+            return
+
+        current = {self._item_id(row): row for row in rows}
+        children = self.tree.get_children()
+        first, _ = self.tree.yview()
+        anchor = None
+        if children:
+            # Top visible row that is not about to move or go away
+            top_index = min(int(round(first * len(children))), len(children) - 1)
+            anchor = next((item for item in children[top_index:]
+                           if item not in current and int(item) not in ids), None)
+
+        for row_id in ids:
+            item = str(row_id)
+            if item not in current and self.tree.exists(item):
+                self._remove(item)
+        for item, row in current.items():
+            if self.tree.exists(item) and self._keys[item] == self.row_key(row):
+                self.tree.item(item, values=self.format_row(row))
+                continue
+            if self.tree.exists(item):
+                self._remove(item)      # sort key changed; re-place it
+            index = self._index_of(self.row_key(row))
+            if index is not None:
+                self._insert(row, index)
+
+        if anchor is not None:
+            self._restore_view(self.tree.index(anchor))
+
+    def _remove(self, item):
+        del self._keys[item]
+        self.tree.delete(item)
+
+    def _precedes(self, key, other):
+        return key > other if self.descending else key < other
+
+    def _index_of(self, key):
+        # Where a row with this key belongs, or None when it falls outside
+        # the loaded window and will arrive with a later page instead.
+        children = self.tree.get_children()
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            if self._precedes(self._keys[children[middle]], key):
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0 and self._more_before:
+            return None
+        if low == len(children) and self._more_after:
+            return None
+        return low
+
+    # ---------- Scrolling ----------
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading or self._idle_id is not None:
+            return
+        if float(last) >= 1 - EDGE and self._more_after:
+            self._idle_id = self.after_idle(self._run, self._load_after)
+        elif float(first) <= EDGE and self._more_before:
+            self._idle_id = self.after_idle(self._run, self._load_before)
+
+    def _run(self, load):
+        self._idle_id = None
+        load()
@@ -0,0 +1,158 @@
+import argparse
+from datetime import date, timedelta
+
+from db import get_connection, transaction, attendance_sources
+import queries
+import date_ranges
+import date_codec
+
+# ---------- Working-Day Calendar ----------
+# The calendar table holds every day from the first year with attendance
+# to the end of next year, with its weekday and whether it is a working
+# day. Weekends are never working days; public holidays are added with
+# set_holiday(). attendance_counts() joins attendance and approved leaves
+# against it to get real present / absent / on-leave figures for every
+# employee in a few index walks.
+#
+#   python work_calendar.py holiday 2026-12-25 "Christmas Day"
+#   python work_calendar.py counts --from 2026-01-01 --to 2026-03-31
+
+WEEKEND = (5, 6)            # Saturday, Sunday
+WEEKDAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday",
+                 "Saturday", "Sunday")
+
+
+def _days(first_year, last_year):
+    day = date(first_year, 1, 1)
+    while day.year <= last_year:
+        weekday = day.weekday()
+        yield (day.isoformat(), day.toordinal() + date_codec.JULIAN_OFFSET,
+               weekday, WEEKDAY_NAMES[weekday], int(weekday not in WEEKEND))
+        day += timedelta(days=1)
+
+
+def fill_calendar(first_year, last_year):
+    # Adds the days of these years; days already there (and their
+    # holidays) are left alone.
+    with transaction() as conn:
+        conn.executemany(queries.INSERT_CALENDAR_DAY, _days(first_year, last_year))
+        conn.execute(queries.NUMBER_WORKING_DAYS)
+
+
+def ensure_calendar():
+    # Covers the first year with attendance through the end of next year.
+    conn = get_connection()
+    first, last = conn.execute(queries.CALENDAR_BOUNDS).fetchone()
+    first_data = conn.execute(queries.FIRST_SUMMARY_YEAR).fetchone()[0]
+    first_year = min(first_data or date.today().year, date.today().year)
+    last_year = date.today().year + 1
+    if first is None or int(first[:4]) > first_year or int(last[:4]) < last_year:
+        fill_calendar(first_year, last_year)
+
+
+def set_holiday(day, name):
+    date_ranges.parse_date(day)
+    ensure_calendar()
+    with transaction() as conn:
+        if conn.execute(queries.SET_HOLIDAY, (name, day)).rowcount == 0:
+            raise ValueError(f"{day} is outside the calendar")
+        conn.execute(queries.NUMBER_WORKING_DAYS)
+
+
+def clear_holiday(day):
+    weekday = date_ranges.parse_date(day).weekday()
+    with transaction() as conn:
+        conn.execute(queries.CLEAR_HOLIDAY, (int(weekday not in WEEKEND), day))
+        conn.execute(queries.NUMBER_WORKING_DAYS)
+
+
+def holidays(start=None, end=None):
+    # (date, weekday name, holiday) in [start, end)
+    return get_connection().execute(queries.HOLIDAYS, (start or date_ranges.MIN_DATE,
+                                                       end or date_ranges.MAX_DATE)).fetchall()
+
+
+# ---------- Attendance Counts ----------
+def counts_sql(sources, integer_dates, one_employee):
+    # (spans, unrecorded leave days, [counts of each attendance table]) as
+    # formatted for attendance_counts(); sources as db.attendance_sources().
+    # Years need not be archived oldest first, so the earliest of every
+    # table's first day
+    first_days = [queries.FIRST_ATTENDANCE.format(source=source) for source in sources]
+    first_day = (first_days[0] if len(first_days) == 1
+                 else queries.EARLIEST.format(values=", ".join(f"({day})" for day in first_days)))
+    fields = {"key": "day" if integer_dates else "date", "first_day": first_day,
+              "employee": "= :employee_id" if one_employee else "IS NOT NULL"}
+    return (queries.ATTENDANCE_SPANS.format(**fields),
+            queries.UNRECORDED_LEAVE_DAYS.format(**fields),
+            [queries.ATTENDANCE_COUNTS.format(source=source, **fields) for source in sources])
+
+
+def attendance_counts(start=date_ranges.MIN_DATE, end=date_ranges.MAX_DATE, employee_id=None):
+    # [(employee_id, present, absent, on_leave, working_days)] for every
+    # employee (or just one) over the half-open ISO range [start, end).
+    # Days after today are not counted, and today only once it has a row.
+    ensure_calendar()
+    conn = get_connection()
+    calendar_start = conn.execute(queries.CALENDAR_BOUNDS).fetchone()[0]
+    today = date.today()
+    start = max(start, calendar_start)
+    until = min(end, today.isoformat())
+    end = min(end, (today + timedelta(days=1)).isoformat())
+    if start >= end:
+        return []
+
+    codec = date_codec.codec()
+    params = {"start": codec.date(start), "end": codec.date(end),
+              "until": codec.date(max(start, until)),
+              "start_date": start, "end_date": end,
+              "employee_id": employee_id}
+    # One read transaction, so the parts agree with each other
+    with transaction(immediate=False) as conn:
+        spans, leave_days, counts = counts_sql(attendance_sources(conn), codec.integer,
+                                               employee_id is not None)
+        recorded = {}
+        for sql in counts:
+            for row_employee, *values in conn.execute(sql, params):
+                total = recorded.setdefault(row_employee, [0, 0, 0, 0])
+                for index, value in enumerate(values):
+                    total[index] += value
+        leaves = {row_employee: (days, past)
+                  for row_employee, days, past in conn.execute(leave_days, params)}
+        rows = []
+        for row_employee, working in conn.execute(spans, params):
+            present, absent, on_leave, working_past = recorded.get(row_employee, (0, 0, 0, 0))
+            leave_total, leave_past = leaves.get(row_employee, (0, 0))
+            rows.append((row_employee, present,
+                         absent + max(0, working - working_past - leave_past),
+                         on_leave + leave_total, working))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Working-day calendar and attendance counts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    holiday = commands.add_parser("holiday", help="mark a public holiday")
+    holiday.add_argument("date")
+    holiday.add_argument("name", nargs="?", default="Public holiday")
+    holiday.add_argument("--remove", action="store_true", help="make it a normal day again")
+    listing = commands.add_parser("holidays", help="list public holidays")
+    listing.add_argument("--year", type=int, default=date.today().year)
+    counts = commands.add_parser("counts", help="present/absent/on-leave days per employee")
+    counts.add_argument("--from", dest="start", help="first day, YYYY-MM-DD")
+    counts.add_argument("--to", dest="end", help="last day, YYYY-MM-DD")
+    counts.add_argument("--employee", type=int)
+    args = parser.parse_args()
+
+    if args.command == "holiday":
+        if args.remove:
+            clear_holiday(args.date)
+        else:
+            set_holiday(args.date, args.name)
+    elif args.command == "holidays":
+        for day, weekday, name in holidays(*date_ranges.year_range(args.year)):
+            print(f"{day}  {weekday:<9}  {name}")
+    else:
+        print("employee_id,present,absent,on_leave,working_days")
+        for row in attendance_counts(*date_ranges.between(args.start, args.end), args.employee):
+            print(",".join(str(value) for value in row))